@@ -0,0 +1,67 @@
+"""
+Time Model.from_dict with the compiled deserializers of garbanzo.util, against the previous implementation, which
+looked up the type of every value and iterated over swagger_types on every call, on a generated list of statements.
+
+    python benchmarks/deserialize_models.py --statements 10000 --repeat 5
+"""
+import argparse
+from datetime import date, datetime
+
+from six import integer_types, iteritems
+
+from garbanzo import util
+from garbanzo.models.statements_result import StatementsResult
+
+from filter_statements import best_time, make_statements
+
+
+def deserialize_before(data, klass):
+    # util._deserialize as generated, with util._generic in place of the GenericMeta checks
+    if data is None:
+        return None
+    if klass in integer_types or klass in (float, str, bool):
+        return util._deserialize_primitive(data, klass)
+    elif klass == object:
+        return data
+    elif klass == date:
+        return util.deserialize_date(data)
+    elif klass == datetime:
+        return util.deserialize_datetime(data)
+    container, args = util._generic(klass)
+    if container is list:
+        return [deserialize_before(x, args[0]) for x in data]
+    if container is dict:
+        return {k: deserialize_before(v, args[1]) for k, v in iteritems(data)}
+    return deserialize_model_before(data, klass)
+
+
+def deserialize_model_before(data, klass):
+    instance = klass()
+    if not instance.swagger_types:
+        return data
+    for attr, attr_type in iteritems(instance.swagger_types):
+        if data is not None and instance.attribute_map[attr] in data and isinstance(data, (list, dict)):
+            value = data[instance.attribute_map[attr]]
+            setattr(instance, attr, deserialize_before(value, attr_type))
+    return instance
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the deserialization of models")
+    parser.add_argument('--statements', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5, help="runs per case, the fastest is reported")
+    args = parser.parse_args(args)
+
+    data = {'statements': make_statements(args.statements)}
+    before_sec, before = best_time(lambda: deserialize_model_before(data, StatementsResult), args.repeat)
+    after_sec, after = best_time(lambda: StatementsResult.from_dict(data), args.repeat)
+    assert after == before
+    print("{} statements".format(args.statements))
+    print("{:<10} {:>10}".format("", "s"))
+    print("{:<10} {:>10.4f}".format("before", before_sec))
+    print("{:<10} {:>10.4f}".format("compiled", after_sec))
+    print("speedup {:.1f}x".format(before_sec / after_sec))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Time the encoding of statements pages: the generated models (Statement(**x) for each statement, then
+encoder.JSONEncoder with the indent of connexion's Jsonifier, which runs the pure python json encoder), against
+garbanzo.serialization (with ujson if installed, else json), per 1000 statements.
+
+    python benchmarks/encode_statements.py --statements 10000 --repeat 5
+"""
+import argparse
+import json
+
+from garbanzo import serialization
+from garbanzo.encoder import JSONEncoder
+from garbanzo.models.statement import Statement
+
+from filter_statements import best_time, make_statements
+
+
+def encode_models(statements):
+    # as connexion.apis.flask_api.Jsonifier.dumps
+    return "{}\n".format(json.dumps([Statement(**x) for x in statements], indent=2, cls=JSONEncoder)).encode('utf-8')
+
+
+def encode_fast(statements):
+    return serialization.dumps([serialization.project(x, Statement) for x in statements])
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the encoding of statements")
+    parser.add_argument('--statements', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5, help="runs per case, the fastest is reported")
+    args = parser.parse_args(args)
+
+    statements = make_statements(args.statements)
+    assert json.loads(encode_fast(statements).decode('utf-8')) == json.loads(encode_models(statements).decode('utf-8'))
+
+    per_1000 = 1000 / len(statements)
+    print("{} statements, {}".format(len(statements), "ujson" if serialization.ujson else "json"))
+    print("{:<10} {:>14}".format("path", "ms / 1000"))
+    models_sec, _ = best_time(lambda: encode_models(statements), args.repeat)
+    fast_sec, _ = best_time(lambda: encode_fast(statements), args.repeat)
+    print("{:<10} {:>14.2f}".format("models", models_sec * 1000 * per_1000))
+    print("{:<10} {:>14.2f}".format("fast", fast_sec * 1000 * per_1000))
+    print("speedup {:.1f}x".format(models_sec / fast_sec))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Time lookup.filter_statements against the previous implementation (one lowercased string per statement built on
+every call, one substring scan per keyword, semantic groups matched as substrings) on generated statements: the
+first call on a list, which builds its index, and the next ones, which reuse the index kept with the list.
+
+    python benchmarks/filter_statements.py --statements 50000 --repeat 5
+"""
+import argparse
+import random
+import string
+import time
+
+from garbanzo.filtering import Statements, label_index
+from garbanzo.lookup import filter_statements
+
+GROUPS = ["", "GENE", "CHEM", "DISO", "LIVB", "GENE CHEM"]
+
+
+def filter_statements_before(datapage, keywords=None, types=None):
+    if keywords:
+        datapage2 = []
+        for dp in datapage:
+            this_labels = dp['subject']['name'] + dp['predicate']['name'] + dp['object']['name']
+            this_labels = this_labels.lower()
+            if any(k.lower() in this_labels for k in keywords):
+                datapage2.append(dp)
+        datapage = datapage2
+    if types:
+        datapage = [x for x in datapage if
+                    any(t in x['subject']['semanticGroup'] + x['object']['semanticGroup'] for t in types)]
+    return datapage
+
+
+def make_statements(n, seed=0):
+    rnd = random.Random(seed)
+
+    def label():
+        return " ".join("".join(rnd.choice(string.ascii_letters) for _ in range(rnd.randint(3, 10)))
+                        for _ in range(rnd.randint(1, 4)))
+
+    return [{'id': "wds:Q{}${}".format(rnd.randint(1, 10 ** 8), i),
+             'subject': {'id': "wd:Q1", 'name': label(), 'semanticGroup': rnd.choice(GROUPS)},
+             'predicate': {'id': "wd:P1", 'name': label()},
+             'object': {'id': "wd:Q2", 'name': label(), 'semanticGroup': rnd.choice(GROUPS)}}
+            for i in range(n)]
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark filter_statements")
+    parser.add_argument('--statements', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5, help="runs per case, the fastest is reported")
+    args = parser.parse_args(args)
+
+    statements = make_statements(args.statements)
+    cases = [("1 keyword", frozenset({"abc"}), None),
+             ("5 keywords", frozenset({"abc", "xyz", "qwe", "mno", "rst"}), None),
+             ("2 types", None, frozenset({"CHEM", "DISO"})),
+             ("5 keywords, 2 types", frozenset({"abc", "xyz", "qwe", "mno", "rst"}), frozenset({"CHEM", "DISO"}))]
+
+    indexed = Statements(statements)
+    start = time.perf_counter()
+    label_index(indexed)
+    print("{} statements, index built in {:.3f}s".format(len(statements), time.perf_counter() - start))
+    print("{:<22} {:>10} {:>10} {:>8} {:>10} {:>8} {:>8}".format("case", "before s", "first s", "speedup", "next s",
+                                                                 "speedup", "matches"))
+    for name, keywords, types in cases:
+        before_sec, before = best_time(lambda: filter_statements_before(statements, keywords, types), args.repeat)
+        # a plain list isn't indexed for good: each call builds the index, as the first call on a cached list does
+        first_sec, first = best_time(lambda: filter_statements(statements, keywords, types), args.repeat)
+        next_sec, after = best_time(lambda: filter_statements(indexed, keywords, types), args.repeat)
+        # semantic groups are now matched exactly, not as substrings, which is the same for the generated ones
+        assert after == first == before
+        print("{:<22} {:>10.4f} {:>10.4f} {:>7.1f}x {:>10.4f} {:>7.1f}x {:>8}".format(
+            name, before_sec, first_sec, before_sec / first_sec, next_sec, before_sec / next_sec, len(after)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure the memory of a page of Statement models (with their subject, predicate and object models): the __slots__
+models with class level maps, against the previous ones, which built their swagger_types and attribute_map dicts in
+__init__ and kept their attributes in a __dict__.
+
+    python benchmarks/model_memory.py --statements 10000
+"""
+import argparse
+import tracemalloc
+
+from garbanzo.models.statement import Statement
+from garbanzo.models.statement_object import StatementObject
+from garbanzo.models.statement_predicate import StatementPredicate
+from garbanzo.models.statement_subject import StatementSubject
+
+from filter_statements import make_statements
+
+
+def previous(model):
+    """
+    :return: a subclass of model as it was generated before: no __slots__, maps built for every instance
+    """
+    swagger_types, attribute_map = model.swagger_types, model.attribute_map
+
+    def __init__(self, **kwargs):
+        self.swagger_types = dict(swagger_types)
+        self.attribute_map = dict(attribute_map)
+        for attr in swagger_types:
+            setattr(self, "_" + attr, kwargs.get(attr))
+
+    return type("Previous" + model.__name__, (model,), {'__init__': __init__})
+
+
+def build(statements, statement, subject, predicate, object_):
+    return [statement(id=x['id'],
+                      subject=subject(id=x['subject']['id'], name=x['subject']['name'],
+                                      semantic_group=x['subject']['semanticGroup']),
+                      predicate=predicate(id=x['predicate']['id'], name=x['predicate']['name']),
+                      object=object_(id=x['object']['id'], name=x['object']['name'],
+                                     semantic_group=x['object']['semanticGroup']))
+            for x in statements]
+
+
+def measure(statements, *models):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    page = build(statements, *models)
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del page
+    return size
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Measure the memory of Statement models")
+    parser.add_argument('--statements', type=int, default=10000)
+    args = parser.parse_args(args)
+
+    statements = make_statements(args.statements)
+    models = [Statement, StatementSubject, StatementPredicate, StatementObject]
+    previous_size = measure(statements, *map(previous, models))
+    slots_size = measure(statements, *models)
+    print("{} statements, 4 models each".format(len(statements)))
+    print("{:<10} {:>12} {:>14}".format("models", "MB", "B / statement"))
+    for name, size in [("previous", previous_size), ("slots", slots_size)]:
+        print("{:<10} {:>12.1f} {:>14.0f}".format(name, size / 2 ** 20, size / len(statements)))
+    print("saving {:.0%}".format(1 - slots_size / previous_size))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Compare the single bidirectional statements query with the one query per direction path
+(settings.STATEMENTS_SINGLE_QUERY) on the same seeds: latency of each, and whether they return the same statements.
+
+    python benchmarks/statements_query.py wd:Q27869338 wd:Q7758678 --repeat 3
+
+The lookups are called directly, so nothing is cached between runs.
+"""
+import argparse
+import time
+
+from garbanzo import lookup, upstream
+
+
+def time_query(s, single_query, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        statements = upstream.run(lookup.aquery_statements([s], single_query=single_query))
+        timings.append(time.perf_counter() - start)
+    return min(timings), statements
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Time the single and split statements queries")
+    parser.add_argument('seeds', nargs='+', help="concept ids, e.g. wd:Q7758678")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per seed and path, the fastest is reported")
+    args = parser.parse_args(args)
+
+    print("{:<16} {:>10} {:>10} {:>8}  {}".format("seed", "single s", "split s", "rows", "same"))
+    for s in args.seeds:
+        single_sec, single = time_query(s, True, args.repeat)
+        split_sec, split = time_query(s, False, args.repeat)
+        print("{:<16} {:>10.3f} {:>10.3f} {:>8}  {}".format(s, single_sec, split_sec, len(single), single == split))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
 
 import connexion
+from .cache import setup_snapshots, setup_stats_logging
 from .encoder import JSONEncoder
+from .validation import ResponseValidator, validate_responses
 
 
 if __name__ == '__main__':
-    app = connexion.App(__name__, specification_dir='./swagger/')
+    app = connexion.App(__name__, specification_dir='./swagger/',
+                        validator_map={'response': ResponseValidator})
     app.app.json_encoder = JSONEncoder
     app.add_api('swagger.yaml',
                 arguments={'title': 'A SPARQL/Wikidata Query API wrapper for Translator'},
-                validate_responses=True)
+                validate_responses=validate_responses())
+    setup_snapshots()  # once the controllers (and so the cached lookups) are loaded
+    setup_stats_logging()
     app.run(port=8080)
@@ -0,0 +1,150 @@
+"""
+Queries with large VALUES sets (e.g. the statements of hundreds of concepts) are split into batches of bounded size,
+run concurrently, and their results merged (see lookup.aquery_statements).
+
+The batch size adapts to the upstream latency: it grows by a step while the batches take less than a target time,
+and is halved when one takes longer or fails for being too big. A batch that fails that way (timed out, URI too
+long) is split in two and retried. Other errors (unreachable, overloaded or down endpoint) fail the query at once.
+"""
+import asyncio
+import logging
+import threading
+import time
+
+from requests import ConnectionError, HTTPError, RequestException, Timeout
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveBatchSize:
+    """
+    Additive increase, multiplicative decrease of a batch size, shared by the threads of a process
+    """
+
+    def __init__(self, size, minimum, maximum, target, step=None):
+        """
+        :param size: initial size
+        :param minimum: smallest size
+        :param maximum: largest size
+        :param target: seconds a batch should take at most
+        :param step: growth after a fast batch, defaults to a tenth of the initial size
+        """
+        self.size = size
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target = target
+        self.step = step or max(1, size // 10)
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            return self.size
+
+    def observe(self, seconds, size):
+        """
+        :param seconds: time taken by a batch
+        :param size: size of the batch
+        """
+        with self._lock:
+            if seconds > self.target:
+                self.size = max(self.minimum, min(self.size, size) // 2)
+            elif size >= self.size:
+                # only full batches tell whether bigger ones would be fast enough
+                self.size = min(self.maximum, self.size + self.step)
+
+    def failed(self, size):
+        with self._lock:
+            self.size = max(self.minimum, min(self.size, size) // 2)
+
+
+def chunks(values, size):
+    """
+    :param values: a collection, or None
+    :return: list of sorted tuples of at most size values, or [None] if there are no values
+    """
+    if not values:
+        return [None]
+    values = sorted(values)
+    return [tuple(values[i:i + size]) for i in range(0, len(values), size)]
+
+
+def batches(size, *value_sets):
+    """
+    :param size: batch size
+    :param value_sets: collections (or None) of values, e.g. s, t, relations
+    :return: list of tuples with at most size values of each of the value_sets, covering all their combinations
+    """
+    result = [()]
+    for values in value_sets:
+        result = [batch + (chunk,) for batch in result for chunk in chunks(values, size)]
+    return result
+
+
+def _batch_size(batch):
+    return max(len(values) for values in batch if values) if any(batch) else 0
+
+
+def _split(batch):
+    # halve the largest set of values of the batch
+    i = max(range(len(batch)), key=lambda i: len(batch[i]) if batch[i] else 0)
+    half = len(batch[i]) // 2
+    return [batch[:i] + (values,) + batch[i + 1:] for values in (batch[i][:half], batch[i][half:])]
+
+
+def is_too_big(error):
+    """
+    Whether a failed query might succeed if it was smaller: when it timed out or its URI was too long, not when
+    wikidata can't be reached, is overloaded or is down (splitting would only send it more queries)
+    """
+    if isinstance(error, ConnectionError):
+        # including ConnectTimeout, which is also a Timeout
+        return False
+    if isinstance(error, Timeout):
+        return True
+    if isinstance(error, HTTPError) and error.response is not None:
+        status = error.response.status_code
+        if status == 500:
+            # the public endpoint answers a query timeout with a 500 and the java exception
+            return "TimeoutException" in _text(error.response)
+        return status in (414, 504)
+    return False
+
+
+def _text(response):
+    try:
+        return response.text
+    except RequestException:
+        return ""  # the body of a streamed response that was closed
+
+
+async def arun_batches(query, batches, batch_size, concurrency):
+    """
+    :param query: coroutine function called with the values of each batch, e.g. query(s, t, relations)
+    :param batches: list of tuples of values (see batches)
+    :param batch_size: the AdaptiveBatchSize told the time each batch took
+    :param concurrency: number of batches run at once
+    :return: list of the results of the batches, in no particular order (a batch that was split has a result for
+    each half)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(batch):
+        size = _batch_size(batch)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await query(*batch)
+            except RequestException as e:
+                if size < 2 or not is_too_big(e):
+                    raise
+                batch_size.failed(size)
+                logger.warning("a batch of %d values failed (%s), splitting it", size, e)
+            else:
+                batch_size.observe(time.perf_counter() - start, size)
+                return [result]
+        # the halves are run once this batch has released the semaphore
+        results = await asyncio.gather(*[run(half) for half in _split(batch)])
+        return [result for half_results in results for result in half_results]
+
+    results = await asyncio.gather(*[run(batch) for batch in batches])
+    return [result for batch_results in results for result in batch_results]
@@ -0,0 +1,726 @@
+"""
+Caching for the upstream lookups.
+
+``cached`` replaces ``cachetools.cached`` for the functions in garbanzo.lookup: the cache is guarded by a lock,
+and concurrent misses on the same key are coalesced so that only one upstream request is made for them
+(see SingleFlight). Expired items can also be served while they are refreshed in the background, or when
+refreshing them fails. Counters for every cached function are available from ``stats()``.
+
+The caches are made with ``make_cache``, which returns the backend selected by settings.CACHE_BACKEND:
+ - "memory": a cachetools.TTLCache private to the worker process (default)
+ - "sqlite": a SQLiteCache in settings.CACHE_PATH, shared by all the worker processes on the host
+
+The in-memory caches can be saved to a snapshot file and loaded back on startup (see save_snapshot and
+load_snapshot), so that a restarted worker doesn't start cold. Items keep the time they expire at. The workers of
+a host share the snapshot file, each one merging its items into it.
+"""
+import atexit
+import fcntl
+import hashlib
+import hmac
+import logging
+import os
+import pickle
+import sqlite3
+import stat
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import wraps
+
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+
+from garbanzo import settings
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_secret = None
+_secret_lock = threading.Lock()
+_refresh_executor = None
+_refresh_executor_pid = None
+_refresh_lock = threading.Lock()
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls made with the same key. The first caller runs the function, the callers that
+    arrive while it is running wait for it and get the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.stats = {'calls': 0, 'coalesced': 0}
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['calls'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+
+def private_dir(path):
+    """
+    Create a directory only the current user can write to, or check that it is one: the caches and snapshots are
+    unpickled, so nobody else must be able to put files there
+    :param path:
+    :return: path
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.stat(path)
+    if st.st_uid != os.getuid() or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError("{} must be a directory owned by the user running garbanzo, that no one else can write "
+                              "to".format(path))
+    return path
+
+
+def _get_secret():
+    """
+    The key the pickles are signed with: settings.CACHE_SECRET, or a random one generated once for all the workers
+    in settings.CACHE_SECRET_PATH
+    """
+    global _secret
+    with _secret_lock:
+        if _secret is None:
+            if settings.CACHE_SECRET:
+                _secret = settings.CACHE_SECRET.encode('utf-8')
+            else:
+                path = settings.CACHE_SECRET_PATH
+                private_dir(os.path.dirname(path))
+                if not os.path.exists(path):
+                    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+                    with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'wb') as f:
+                        f.write(os.urandom(32))
+                    try:
+                        os.link(tmp_path, path)  # unless another worker made it first
+                    except FileExistsError:
+                        pass
+                    finally:
+                        os.unlink(tmp_path)
+                with open(path, 'rb') as f:
+                    _secret = f.read()
+        return _secret
+
+
+class InvalidSignature(ValueError):
+    pass
+
+
+def sign_dumps(value):
+    """
+    :return: the value pickled, compressed, and signed with the secret (see _get_secret)
+    """
+    data = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    return hmac.new(_get_secret(), data, hashlib.sha256).digest() + data
+
+
+def verify_loads(data):
+    """
+    :return: the value of sign_dumps, if its signature is valid (raises InvalidSignature otherwise)
+    """
+    signature, data = data[:32], data[32:]
+    if not hmac.compare_digest(signature, hmac.new(_get_secret(), data, hashlib.sha256).digest()):
+        raise InvalidSignature("invalid signature")
+    return pickle.loads(zlib.decompress(data))
+
+
+def _canonical(key):
+    """
+    A representation of a cache key that is the same in every process
+    (iterating a frozenset depends on the hash seed of the process)
+    """
+    if isinstance(key, (set, frozenset)):
+        return ('frozenset', sorted((_canonical(x) for x in key), key=repr))
+    if isinstance(key, (tuple, list)):
+        return tuple(_canonical(x) for x in key)
+    return key
+
+
+class SQLiteCache:
+    """
+    A cache with per-item time-to-live stored in a sqlite database, so that it can be shared by several processes.
+    Values are stored pickled, compressed and signed (see sign_dumps): an item that wasn't stored by garbanzo is a
+    miss. Keys are stored as a digest of their canonical representation. The database must be in a private directory.
+
+    The cache holds at most about maxsize items: expired items, and then the ones closest to expiring, are purged
+    every PURGE_INTERVAL writes.
+    """
+    PURGE_INTERVAL = 100
+
+    def __init__(self, name, maxsize, ttl, path=None, timer=time.time):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path or settings.CACHE_PATH
+        self.timer = timer
+        self._local = threading.local()
+        self._writes = 0
+
+    @property
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            private_dir(os.path.dirname(os.path.abspath(self.path)))
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("CREATE TABLE IF NOT EXISTS cache (name TEXT, key BLOB, value BLOB, expires REAL, "
+                       "PRIMARY KEY (name, key)) WITHOUT ROWID")
+            db.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (name, expires)")
+            db.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT, key BLOB, expires REAL, "
+                       "PRIMARY KEY (name, key)) WITHOUT ROWID")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    @staticmethod
+    def _key(key):
+        return hashlib.sha1(repr(_canonical(key)).encode('utf-8')).digest()
+
+    dumps = staticmethod(sign_dumps)
+    loads = staticmethod(verify_loads)
+
+    def __getitem__(self, key):
+        row = self._db.execute("SELECT value FROM cache WHERE name = ? AND key = ? AND expires > ?",
+                               (self.name, self._key(key), self.timer())).fetchone()
+        if row is None:
+            raise KeyError(key)
+        try:
+            return self.loads(row[0])
+        except InvalidSignature:
+            logger.warning("ignoring the item of %s with an invalid signature in %s", self.name, self.path)
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO cache (name, key, value, expires) VALUES (?, ?, ?, ?)",
+                         (self.name, self._key(key), self.dumps(value), self.timer() + self.ttl))
+        self._writes += 1
+        if self._writes % self.PURGE_INTERVAL == 0:
+            self.expire()
+
+    def __delitem__(self, key):
+        cursor = self._db.execute("DELETE FROM cache WHERE name = ? AND key = ?", (self.name, self._key(key)))
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self._db.execute("SELECT 1 FROM cache WHERE name = ? AND key = ? AND expires > ?",
+                                (self.name, self._key(key), self.timer())).fetchone() is not None
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM cache WHERE name = ? AND expires > ?",
+                                (self.name, self.timer())).fetchone()[0]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def expire(self):
+        """
+        Remove the expired items, and the items closest to expiring beyond maxsize
+        """
+        db = self._db
+        db.execute("DELETE FROM cache WHERE name = ? AND expires <= ?", (self.name, self.timer()))
+        db.execute("DELETE FROM cache WHERE name = ? AND key IN (SELECT key FROM cache WHERE name = ? "
+                   "ORDER BY expires DESC LIMIT -1 OFFSET ?)", (self.name, self.name, self.maxsize))
+
+    def clear(self):
+        self._db.execute("DELETE FROM cache WHERE name = ?", (self.name,))
+
+    def lease(self, key, seconds):
+        """
+        Claim the loading of an item for the processes sharing the cache, unless another one holds the claim
+        :param key:
+        :param seconds: the claim expires after that, in case its holder died
+        :return: whether the claim was taken
+        """
+        db = self._db
+        now = self.timer()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM leases WHERE name = ? AND key = ? AND expires <= ?",
+                       (self.name, self._key(key), now))
+            taken = db.execute("INSERT OR IGNORE INTO leases (name, key, expires) VALUES (?, ?, ?)",
+                               (self.name, self._key(key), now + seconds)).rowcount == 1
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+        return taken
+
+    def release(self, key):
+        self._db.execute("DELETE FROM leases WHERE name = ? AND key = ?", (self.name, self._key(key)))
+
+
+def make_cache(name, maxsize, ttl):
+    """
+    Make a cache with the backend selected by settings.CACHE_BACKEND
+    :param name: name of the cache, unique among the caches sharing a backend
+    :param maxsize: maximum number of items
+    :param ttl: time-to-live of the items, in seconds
+    """
+    if settings.CACHE_BACKEND == 'memory':
+        return TTLCache(maxsize, ttl)
+    if settings.CACHE_BACKEND == 'sqlite':
+        return SQLiteCache(name, maxsize, ttl)
+    raise ValueError("unknown cache backend: {}".format(settings.CACHE_BACKEND))
+
+
+def lookup_cache(name, maxsize, ttl, stale_while_revalidate=None, stale_if_error=None):
+    """
+    Arguments for cached or cached_items, e.g. ``@cached(**lookup_cache('get_equiv_item', 10000, 300))``:
+    a cache from make_cache whose items are fresh for ttl seconds, and then kept to be served stale.
+    The stale windows default to settings.CACHE_STALE_WHILE_REVALIDATE_SEC and settings.CACHE_STALE_IF_ERROR_SEC
+    """
+    if stale_while_revalidate is None:
+        stale_while_revalidate = settings.CACHE_STALE_WHILE_REVALIDATE_SEC
+    if stale_if_error is None:
+        stale_if_error = settings.CACHE_STALE_IF_ERROR_SEC
+    return {'cache': make_cache(name, maxsize, ttl + max(stale_while_revalidate, stale_if_error)),
+            'ttl': ttl,
+            'stale_while_revalidate': stale_while_revalidate,
+            'stale_if_error': stale_if_error}
+
+
+def get_refresh_executor():
+    """
+    Get the thread pool of the current worker process that stale items are refreshed in
+    """
+    global _refresh_executor, _refresh_executor_pid
+    pid = os.getpid()
+    if _refresh_executor_pid != pid:
+        with _refresh_lock:
+            if _refresh_executor_pid != pid:
+                _refresh_executor = ThreadPoolExecutor(max_workers=settings.CACHE_REFRESH_WORKERS)
+                _refresh_executor_pid = pid
+    return _refresh_executor
+
+
+def _log_refresh_error(future):
+    if future.exception() is not None:
+        logger.warning("background refresh failed: %r", future.exception())
+
+
+def _refresh(flight, key, func, *args):
+    """
+    Refresh a stale item in the background, unless it is already being loaded
+    """
+    if not flight.in_flight(key):
+        get_refresh_executor().submit(flight.do, key, func, *args).add_done_callback(_log_refresh_error)
+
+
+def _fresh_until(ttl):
+    return time.time() + ttl if ttl is not None else float('inf')
+
+
+def _lease(cache, k):
+    """
+    Claim the loading of the item k of a cache shared by several processes (see SQLiteCache.lease), waiting while
+    another process holds the claim, i.e. is loading it. The claims last settings.CACHE_LEASE_SEC.
+    :return: the item, if the other process loaded it meanwhile (and the claim isn't taken), else None
+    """
+    while not cache.lease(k, settings.CACHE_LEASE_SEC):
+        time.sleep(settings.CACHE_LEASE_POLL_SEC)
+        entry = cache.get(k)
+        if entry is not None and time.time() < entry[1]:
+            return entry
+    return None
+
+
+def cached(cache, key=hashkey, ttl=None, stale_while_revalidate=0, stale_if_error=0):
+    """
+    Decorator to wrap a function with a memoizing callable that saves results in a cache.
+    Concurrent calls that miss the cache with the same key share one call of the function: within a process, and
+    across the processes sharing a cache that can lease its items (a SQLiteCache).
+
+    Items are fresh for ttl seconds (or for as long as the cache keeps them if ttl is None). An item that is no
+    longer fresh, but still in the cache, is:
+     - returned right away while it is refreshed in the background, up to stale_while_revalidate seconds past its ttl
+     - returned if the function raises, up to stale_if_error seconds past its ttl
+    so the time-to-live of the cache itself must cover ttl plus the stale windows.
+    :param cache: a cachetools cache, or a cache from make_cache
+    :param key: function building the cache key from the call arguments
+    :param ttl: seconds an item is fresh for
+    :param stale_while_revalidate: seconds
+    :param stale_if_error: seconds
+    """
+
+    def decorator(func):
+        lock = threading.RLock()
+        flight = SingleFlight()
+        counters = {'hits': 0, 'misses': 0, 'stale_served': 0, 'stale_on_error': 0, 'coalesced_remote': 0}
+
+        def load(k, args, kwargs):
+            # another flight may have refreshed the item since this caller looked it up
+            with lock:
+                entry = cache.get(k)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+            if not hasattr(cache, 'lease'):
+                return call(k, args, kwargs)
+            entry = _lease(cache, k)
+            if entry is not None:
+                with lock:
+                    counters['coalesced_remote'] += 1
+                return entry[0]
+            try:
+                return call(k, args, kwargs)
+            finally:
+                cache.release(k)
+
+        def call(k, args, kwargs):
+            v = func(*args, **kwargs)
+            with lock:
+                try:
+                    cache[k] = (v, _fresh_until(ttl))
+                except ValueError:
+                    pass  # value too large
+            return v
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            k = key(*args, **kwargs)
+            now = time.time()
+            with lock:
+                entry = cache.get(k)
+                if entry is not None and now < entry[1]:
+                    counters['hits'] += 1
+                    return entry[0]
+                if entry is not None and now < entry[1] + stale_while_revalidate:
+                    counters['stale_served'] += 1
+                    _refresh(flight, k, load, k, args, kwargs)
+                    return entry[0]
+                counters['misses'] += 1
+            try:
+                return flight.do(k, load, k, args, kwargs)
+            except Exception:
+                if entry is None or now >= entry[1] + stale_if_error:
+                    raise
+                logger.warning("%s failed, serving a stale item", func.__name__, exc_info=True)
+                with lock:
+                    counters['stale_on_error'] += 1
+                return entry[0]
+
+        def cache_stats():
+            with lock:
+                return dict(counters, **flight.stats)
+
+        def cache_get(*args, **kwargs):
+            # the fresh cached result of a call, without calling the function: None if there is none
+            with lock:
+                entry = cache.get(key(*args, **kwargs))
+            return entry[0] if entry is not None and time.time() < entry[1] else None
+
+        def cache_set(value, *args, **kwargs):
+            # cache the result of a call computed otherwise, e.g. as part of a larger call
+            with lock:
+                try:
+                    cache[key(*args, **kwargs)] = (value, _fresh_until(ttl))
+                except ValueError:
+                    pass  # value too large
+
+        wrapper.cache = cache
+        wrapper.cache_key = key
+        wrapper.cache_lock = lock
+        wrapper.cache_stats = cache_stats
+        wrapper.cache_get = cache_get
+        wrapper.cache_set = cache_set
+        wrapper.cache_max_stale = max(stale_while_revalidate, stale_if_error)
+        _registry[func.__module__ + '.' + func.__name__] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def cached_items(cache, key=lambda x: x, ttl=None, stale_while_revalidate=0, stale_if_error=0):
+    """
+    Decorator for functions that look up many items at once, called with an iterable of ids and returning
+    {id: value}. Each item is cached on its own: a call returns the cached items right away, and calls the function
+    once, with the ids that are missing from the cache. Ids the function returns nothing for are not cached.
+    Stale items are handled per item, as in cached, and so are the concurrent misses.
+    :param cache: a cachetools cache, or a cache from make_cache
+    :param key: normalizes an input id to the id it is returned under
+    :param ttl: seconds an item is fresh for
+    :param stale_while_revalidate: seconds
+    :param stale_if_error: seconds
+    """
+
+    def decorator(func):
+        lock = threading.RLock()
+        flight = SingleFlight()
+        counters = {'hits': 0, 'misses': 0, 'stale_served': 0, 'stale_on_error': 0, 'coalesced_remote': 0}
+
+        def load(ids):
+            if not hasattr(cache, 'lease'):
+                return call(ids)
+            # load the items no other process is loading, then wait for the others
+            leased = tuple(k for k in ids if cache.lease(k, settings.CACHE_LEASE_SEC))
+            try:
+                items = call(leased) if leased else dict()
+            finally:
+                for k in leased:
+                    cache.release(k)
+            for k in ids:
+                if k in leased:
+                    continue
+                entry = _lease(cache, k)
+                if entry is not None:
+                    with lock:
+                        counters['coalesced_remote'] += 1
+                    items[k] = entry[0]
+                    continue
+                try:
+                    items.update(call((k,)))
+                finally:
+                    cache.release(k)
+            return items
+
+        def call(ids):
+            items = func(ids)
+            fresh_until = _fresh_until(ttl)
+            with lock:
+                for k, v in items.items():
+                    try:
+                        cache[k] = (v, fresh_until)
+                    except ValueError:
+                        pass
+            return items
+
+        @wraps(func)
+        def wrapper(ids):
+            now = time.time()
+            items = dict()
+            missing = []
+            refresh = []
+            stale = dict()  # items that can be served if loading the missing ones fails
+            with lock:
+                for k in set(map(key, ids)):
+                    entry = cache.get(k)
+                    if entry is not None and now < entry[1]:
+                        items[k] = entry[0]
+                    elif entry is not None and now < entry[1] + stale_while_revalidate:
+                        items[k] = entry[0]
+                        refresh.append(k)
+                    else:
+                        missing.append(k)
+                        if entry is not None and now < entry[1] + stale_if_error:
+                            stale[k] = entry[0]
+                counters['hits'] += len(items) - len(refresh)
+                counters['stale_served'] += len(refresh)
+                counters['misses'] += len(missing)
+            if refresh:
+                refresh = tuple(sorted(refresh))
+                _refresh(flight, refresh, load, refresh)
+            if missing:
+                missing = tuple(sorted(missing))
+                try:
+                    items.update(flight.do(missing, load, missing))
+                except Exception:
+                    if len(stale) < len(missing):
+                        raise
+                    logger.warning("%s failed, serving stale items", func.__name__, exc_info=True)
+                    with lock:
+                        counters['stale_on_error'] += len(stale)
+                    items.update(stale)
+            return items
+
+        def cache_stats():
+            with lock:
+                return dict(counters, **flight.stats)
+
+        wrapper.cache = cache
+        wrapper.cache_key = key
+        wrapper.cache_lock = lock
+        wrapper.cache_stats = cache_stats
+        wrapper.cache_max_stale = max(stale_while_revalidate, stale_if_error)
+        _registry[func.__module__ + '.' + func.__name__] = wrapper
+        return wrapper
+
+    return decorator
+
+
+def stats():
+    """
+    Counters of every cached function: hits, misses, stale items served (while being refreshed, or because
+    refreshing them failed), upstream calls made and calls coalesced into another one (of this process, or of
+    another process sharing the cache)
+    :return: {function name: {counter: value}}
+    """
+    return {name: wrapper.cache_stats() for name, wrapper in _registry.items()}
+
+
+def _log_stats(interval):
+    while True:
+        time.sleep(interval)
+        for name, counters in sorted(stats().items()):
+            logger.info("cache %s: %s", name, " ".join("{}={}".format(k, v) for k, v in sorted(counters.items())))
+
+
+def setup_stats_logging(interval=None):
+    """
+    Log the counters of the cached functions (see stats) every interval seconds
+    :param interval: seconds, defaults to settings.CACHE_STATS_LOG_INTERVAL_SEC. 0 to never log them
+    """
+    interval = settings.CACHE_STATS_LOG_INTERVAL_SEC if interval is None else interval
+    if interval:
+        threading.Thread(target=_log_stats, args=(interval,), daemon=True).start()
+
+
+SNAPSHOT_VERSION = 1
+
+
+def save_snapshot(path):
+    """
+    Save the items of the in-memory caches to a file (a signed compressed pickle, see sign_dumps), written atomically
+    in a private directory.
+    The workers of a host share the file: the items already in it are kept, unless this worker has fresher ones, or
+    they are too old to be served, or too many for the cache (the freshest ones are kept).
+    Caches with a shared backend are persistent already and are skipped.
+    :param path:
+    :return: number of items saved
+    """
+    now = time.time()
+    with _locked(path):
+        previous = _read_snapshot(path) if os.path.exists(path) else {}
+        caches = dict()
+        for name, wrapper in _registry.items():
+            if isinstance(wrapper.cache, SQLiteCache):
+                continue
+            items = {k: (value, fresh_until) for k, value, fresh_until in previous.get(name, ())
+                     if now < fresh_until + wrapper.cache_max_stale}
+            with wrapper.cache_lock:
+                for k, entry in wrapper.cache.items():
+                    # keys are saved as plain tuples: the hash cached by cachetools' keys is only valid in this process
+                    k = tuple(k) if isinstance(k, tuple) else k
+                    if k not in items or items[k][1] < entry[1]:
+                        items[k] = (entry[0], entry[1])
+            items = sorted(items.items(), key=lambda item: item[1][1],
+                           reverse=True)[:getattr(wrapper.cache, 'maxsize', None)]
+            caches[name] = [(k, value, fresh_until) for k, (value, fresh_until) in items]
+        data = sign_dumps({'version': SNAPSHOT_VERSION, 'created': now, 'caches': caches})
+        tmp_path = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    n = sum(len(items) for items in caches.values())
+    logger.info("saved %d cached items to %s", n, path)
+    return n
+
+
+@contextmanager
+def _locked(path):
+    # hold an exclusive lock on path + ".lock" while the snapshot at path is read and replaced
+    private_dir(os.path.dirname(os.path.abspath(path)))
+    with open(path + ".lock", 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read_snapshot(path):
+    """
+    :return: {function name: [(key, value, fresh until)]}, empty if the snapshot has an unknown version or an invalid
+    signature
+    """
+    private_dir(os.path.dirname(os.path.abspath(path)))
+    with open(path, 'rb') as f:
+        try:
+            snapshot = verify_loads(f.read())
+        except InvalidSignature:
+            logger.warning("ignoring snapshot %s: invalid signature", path)
+            return {}
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        logger.warning("ignoring snapshot %s: unknown version %s", path, snapshot.get('version'))
+        return {}
+    return snapshot['caches']
+
+
+def load_snapshot(path):
+    """
+    Load the items of a snapshot into the caches. Items too old to be served, even stale, are dropped.
+    :param path:
+    :return: number of items loaded
+    """
+    now = time.time()
+    n = 0
+    for name, items in _read_snapshot(path).items():
+        wrapper = _registry.get(name)
+        if wrapper is None:
+            continue
+        with wrapper.cache_lock:
+            for k, value, fresh_until in items:
+                if now < fresh_until + wrapper.cache_max_stale:
+                    wrapper.cache[k] = (value, fresh_until)
+                    n += 1
+    logger.info("loaded %d cached items from %s", n, path)
+    return n
+
+
+def _save_snapshots(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            save_snapshot(path)
+        except Exception:
+            logger.exception("saving the cache snapshot failed")
+
+
+def setup_snapshots(path=None, interval=None):
+    """
+    Load the cache snapshot if there is one, then save it every interval seconds and on exit.
+    Does nothing if no path is given nor set in settings.CACHE_SNAPSHOT_PATH
+    :param path:
+    :param interval: seconds, defaults to settings.CACHE_SNAPSHOT_INTERVAL_SEC. 0 to only save on exit
+    """
+    path = path or settings.CACHE_SNAPSHOT_PATH
+    interval = settings.CACHE_SNAPSHOT_INTERVAL_SEC if interval is None else interval
+    if not path:
+        return
+    if os.path.exists(path):
+        try:
+            load_snapshot(path)
+        except Exception:
+            logger.exception("loading the cache snapshot failed")
+    if interval:
+        threading.Thread(target=_save_snapshots, args=(path, interval), daemon=True).start()
+    atexit.register(save_snapshot, path)
@@ -0,0 +1,166 @@
+"""
+The subclass (P279*) closure of the types of utils.qid_semgroup: every type whose instances are in a semantic group,
+with the groups, e.g. a specific disease class is a DISO type because it is a subclass of disease (Q12136).
+
+It is built offline, as computing it with property paths at request time is way too slow:
+
+    python -m garbanzo.closure /var/lib/garbanzo/semgroup_closure.json.gz
+
+and loaded at startup from settings.SEMGROUP_CLOSURE_PATH, after which utils.get_semgroups_from_qids uses it.
+
+The file is gzipped json: {"version": 1, "built": <unix time>, "groups": {"<groups>": [<qid numbers>]}}, the
+space separated semantic groups of each type being the key of the list of types with exactly these groups.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import time
+
+from requests import RequestException
+
+from garbanzo import batching, settings
+
+FORMAT_VERSION = 1
+BATCH_SIZE = 500  # types whose direct subclasses are queried at once
+BATCH_TARGET_SEC = 20
+BATCH_CONCURRENCY = 2
+
+logger = logging.getLogger(__name__)
+
+
+def build(qid_semgroup):
+    """
+    Query the subclasses of each type
+    :param qid_semgroup: {type qid: [semantic groups]}
+    :return: {qid number: tuple of semantic groups}
+    """
+    groups = {}
+    for root, root_groups in sorted(qid_semgroup.items()):
+        try:
+            subclasses = subclasses_of(root)
+        except RequestException as e:
+            raise RuntimeError("querying the subclasses of {} failed: {}".format(root, e)) from e
+        logger.info("%s: %d subclasses", root, len(subclasses))
+        for qid in subclasses:
+            groups.setdefault(qid, set()).update(root_groups)
+    return _intern({qid: tuple(sorted(x)) for qid, x in groups.items()})
+
+
+def subclasses_of(root):
+    """
+    The subclasses (P279*) of a type, found level by level rather than with one unbounded property path query: the
+    direct subclasses of the types of a level are queried in batches of BATCH_SIZE types at most, which are split
+    when they time out (see garbanzo.batching)
+    :param root: e.g. "Q12136"
+    :return: set of qid numbers, with the root's
+    """
+    from garbanzo import upstream
+
+    found = {int(root[1:])}
+    level = found
+    batch_size = batching.AdaptiveBatchSize(BATCH_SIZE, 1, BATCH_SIZE, BATCH_TARGET_SEC)
+    while level:
+        results = upstream.run(batching.arun_batches(_asubclasses, batching.batches(batch_size.get(), level),
+                                                     batch_size, BATCH_CONCURRENCY))
+        level = set(qid for result in results for qid in result) - found
+        found |= level
+    return found
+
+
+async def _asubclasses(qids):
+    # the direct subclasses of the types
+    from garbanzo.utils import aexecute_sparql_query
+
+    query = "SELECT ?c WHERE {{ VALUES ?p {{ {} }} ?c wdt:P279 ?p }}".format(" ".join("wd:Q{}".format(x) for x in qids))
+    bindings = (await aexecute_sparql_query(query))['results']['bindings']
+    subclasses = [x['c']['value'].rsplit("/", 1)[-1] for x in bindings]
+    return [int(x[1:]) for x in subclasses if x.startswith("Q") and x[1:].isdigit()]
+
+
+def _intern(closure):
+    # one tuple per combination of groups, shared by all the types with it
+    tuples = {}
+    return {qid: tuples.setdefault(x, x) for qid, x in closure.items()}
+
+
+def save(closure, path):
+    by_groups = {}
+    for qid, groups in closure.items():
+        by_groups.setdefault(" ".join(groups), []).append(qid)
+    data = {'version': FORMAT_VERSION, 'built': time.time(),
+            'groups': {groups: sorted(qids) for groups, qids in by_groups.items()}}
+    tmp_path = "{}.{}.tmp".format(path, os.getpid())
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def load(path):
+    """
+    :return: {qid number: tuple of semantic groups}
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != FORMAT_VERSION:
+        raise ValueError("{}: unsupported closure version {}".format(path, data.get('version')))
+    closure = {}
+    for groups, qids in data['groups'].items():
+        groups = tuple(groups.split())
+        for qid in qids:
+            closure[qid] = groups
+    return closure
+
+
+def semgroups(qid):
+    """
+    :param qid: e.g. "Q12136"
+    :return: the semantic groups of the type (empty if it has none), or None if the closure isn't loaded
+    """
+    if index is None:
+        return None
+    try:
+        return index.get(int(qid[1:]), ())
+    except ValueError:
+        return ()
+
+
+def setup(path=None):
+    """
+    Load the closure from path (default: settings.SEMGROUP_CLOSURE_PATH), if there is one
+    """
+    global index
+    path = path if path is not None else settings.SEMGROUP_CLOSURE_PATH
+    if not path:
+        return
+    try:
+        index = load(path)
+    except (OSError, ValueError):
+        logger.exception("loading the semantic group closure from %s failed, only the direct types are used", path)
+        return
+    logger.info("loaded the semantic groups of %d types from %s", len(index), path)
+
+
+index = None
+setup()
+
+
+def main(args=None):
+    from garbanzo.utils import qid_semgroup
+
+    parser = argparse.ArgumentParser(description="Build the subclass closure of the semantic group types")
+    parser.add_argument('path', help="file to write, e.g. semgroup_closure.json.gz")
+    args = parser.parse_args(args)
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        closure = build(qid_semgroup)
+    except RuntimeError as e:
+        parser.exit(1, "building the closure failed, {} was not written: {}\n".format(args.path, e))
+    save(closure, args.path)
+    print("saved the semantic groups of {} types to {}".format(len(closure), args.path))
+
+
+if __name__ == '__main__':
+    main()
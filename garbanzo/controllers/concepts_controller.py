@@ -24,7 +24,7 @@ def get_concept_details(conceptId):
     if not conceptId.startswith("wd:"):
         return []
     try:
-        concept = lookup.getConcept(conceptId)
+        concept = dict(lookup.getConcept(conceptId))  # don't add the details to the cached concept
         details = lookup.get_concept_details(conceptId)
         concept['details'] = details
         return [concept]
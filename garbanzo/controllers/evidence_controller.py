@@ -1,5 +1,6 @@
 import connexion
-import requests
+
+from garbanzo import upstream
 
 from garbanzo.models.annotation import Annotation
 from datetime import date, datetime
@@ -34,9 +35,7 @@ def get_evidence(statementId, keywords=None, pageNumber=None, pageSize=None):
     params = {'action': 'wbgetclaims',
               'claim': statementId,
               'format': 'json'}
-    r = requests.get("https://www.wikidata.org/w/api.php", params=params)
-    r.raise_for_status()
-    d = r.json()
+    d = upstream.get_wikidata_api(params)
     pid = list(d['claims'].keys())[0]
     qid = statementId.split("$")[0].upper()
     url = "https://www.wikidata.org/wiki/{}#{}".format(qid, pid)
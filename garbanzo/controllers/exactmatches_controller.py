@@ -5,7 +5,7 @@ from datetime import date, datetime
 from typing import List, Dict
 from six import iteritems
 
-from garbanzo.lookup import get_equiv_item, getEntitiesCurieClaims
+from garbanzo.lookup import get_equiv_item, get_equiv_items, getEntitiesCurieClaims
 from ..util import deserialize_date, deserialize_datetime
 
 
@@ -48,7 +48,7 @@ def get_exact_matches_to_concept_list(c):
 
     # for curies specifically, get the matching qids
     curies = set(x for x in input_concepts if not x.startswith("wd:"))
-    equiv_qid = {curie: get_equiv_item(curie) for curie in curies}
+    equiv_qid = get_equiv_items(curies)
     # and add in the input qids
     input_qids = set(x for x in input_concepts if x.startswith("wd:"))
     qids = set(chain(*equiv_qid.values())) | input_qids
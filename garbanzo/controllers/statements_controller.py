@@ -1,9 +1,13 @@
 from itertools import chain
 
 import connexion
+from flask import request, Response
+from werkzeug.exceptions import abort
 
-from garbanzo import lookup
+from garbanzo import cursors, lookup, serialization
 from garbanzo.models.statement import Statement
+from garbanzo.models.statements_query import StatementsQuery
+from garbanzo.models.statements_result import StatementsResult
 from datetime import date, datetime
 from typing import List, Dict
 from six import iteritems
@@ -11,8 +15,11 @@ from six import iteritems
 from garbanzo.utils import always_curie
 from ..util import deserialize_date, deserialize_datetime
 
+NDJSON = "application/x-ndjson"
 
-def get_statements(s, relations=None, t=None, keywords=None, semanticGroups=None, pageNumber=None, pageSize=None):
+
+def get_statements(s, relations=None, t=None, keywords=None, semanticGroups=None, pageNumber=None, pageSize=None,
+                   cursor=None, stream=None):
     """
     get_statements
     Given a specified set of [CURIE-encoded](https://www.w3.org/TR/curie/)  'source' ('s')
@@ -42,10 +49,71 @@ def get_statements(s, relations=None, t=None, keywords=None, semanticGroups=None
     :type pageNumber: int
     :param pageSize: number of concepts per page to be returned in a paged set of query results 
     :type pageSize: int
+    :param cursor: * to page through a snapshot of the results, or the X-Next-Cursor of the previous page.
+    pageNumber is ignored
+    :type cursor: str
+    :param stream: send all the statements as newline delimited json, each one as soon as it is read from wikidata
+    (as does an Accept: application/x-ndjson header). The paging parameters are ignored
+    :type stream: bool
 
     :rtype: List[Statement]
     """
 
+    s, t, relations, keywords, types = _parse_query(s, t, relations, keywords, semanticGroups)
+
+    if stream or request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON:
+        statements = lookup.iter_statements(s, t, relations, keywords, types)
+        return Response((serialization.dumps(serialization.project(x, Statement)) + b"\n" for x in statements),
+                        mimetype=NDJSON)
+
+    pageNumber = pageNumber if pageNumber else 1
+    pageSize = pageSize if pageSize else 10
+
+    if cursor:
+        query = tuple(sorted(x) if x else None for x in (s, t, relations, keywords, types))
+        try:
+            if cursor == cursors.START:
+                cursor = cursors.start(lookup.query_and_filter_statements(s, t, relations, keywords, types), query)
+            datapage, next_cursor = cursors.get_page(cursor, query, pageSize)
+        except cursors.InvalidCursor as e:
+            abort(400, str(e))
+        headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+        return serialization.json_response(datapage, Statement, headers=headers)
+
+    start_idx = ((pageNumber - 1) * pageSize)
+
+    datapage = lookup.get_statements_page(s, t, relations, keywords, types, start_idx, pageSize)
+    return serialization.json_response(datapage, Statement)
+
+
+def get_statements_batch(body):
+    """
+    get_statements_batch
+    Runs many statements queries at once, e.g. one per seed concept. The queries are planned together (see
+    lookup.query_statements_batch), so a batch costs far fewer queries to wikidata than as many /statements calls.
+    :param body: the queries, each one with the parameters of a /statements call
+    :type body: list | bytes
+
+    :rtype: List[StatementsResult]
+    """
+    if connexion.request.is_json:
+        body = [StatementsQuery.from_dict(d) for d in connexion.request.get_json()]
+
+    queries = []
+    for query in body:
+        pageNumber = query.page_number if query.page_number else 1
+        pageSize = query.page_size if query.page_size else 10
+        queries.append(_parse_query(query.s, query.t, query.relations, query.keywords, query.semantic_groups) +
+                       ((pageNumber - 1) * pageSize, pageSize))
+
+    datapages = lookup.get_statements_batch(queries)
+    return serialization.json_response([{'statements': datapage} for datapage in datapages], StatementsResult)
+
+
+def _parse_query(s, t=None, relations=None, keywords=None, semanticGroups=None):
+    """
+    :return: the parameters of a statements query, as (s, t, relations, keywords, types) sets
+    """
     # This will only accept wd items in s and t
     # TODO: This can be made to handle other curies
 
@@ -54,14 +122,4 @@ def get_statements(s, relations=None, t=None, keywords=None, semanticGroups=None
     relations = frozenset(relations.split(" ")) if relations else None
     keywords = frozenset(keywords.split(" ")) if keywords else None
     types = frozenset(semanticGroups.split(" ")) if semanticGroups else None
-
-    datapage = lookup.query_and_filter_statements(s, t, relations, keywords, types)
-
-    pageNumber = pageNumber if pageNumber else 1
-    pageSize = pageSize if pageSize else 10
-
-    start_idx = ((pageNumber - 1) * pageSize)
-    end_idx = start_idx + pageSize
-
-    datapage = datapage[start_idx:end_idx]
-    return [Statement(**x) for x in datapage]
+    return s, t, relations, keywords, types
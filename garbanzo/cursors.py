@@ -0,0 +1,98 @@
+"""
+Cursor pagination over server-side snapshots of results.
+
+The first page of a cursor query computes the whole result once and saves it as a snapshot. Each page returns an
+opaque cursor to the next one, and that page is a slice of the snapshot. Deep pages cost no more than the first
+ones, and the pages don't shift when the lookup caches expire.
+
+A snapshot is stored in chunks of CHUNK_SIZE items in a cache from garbanzo.cache.make_cache, so with the sqlite
+backend any worker can serve the next page. The store holds settings.CURSOR_MAX_CHUNKS chunks at most, evicting
+the least recently used ones, and snapshots expire settings.CURSOR_TTL_SEC after they are made. A cursor whose
+snapshot is gone is rejected with InvalidCursor, and the client starts over.
+"""
+import base64
+import binascii
+import hashlib
+import os
+import threading
+
+from garbanzo import settings
+from garbanzo.cache import make_cache
+
+START = "*"  # the cursor of the first page of a new snapshot
+CHUNK_SIZE = 100
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = make_cache('cursors', settings.CURSOR_MAX_CHUNKS, settings.CURSOR_TTL_SEC)
+        return _store
+
+
+def _query_digest(query):
+    return hashlib.sha1(repr(query).encode('utf-8')).hexdigest()
+
+
+def _encode(snapshot_id, offset):
+    return base64.urlsafe_b64encode("{}.{}".format(snapshot_id, offset).encode('ascii')).decode('ascii')
+
+
+def _decode(cursor):
+    try:
+        snapshot_id, offset = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').split(".")
+        return snapshot_id, int(offset)
+    except (ValueError, binascii.Error, UnicodeError):
+        raise InvalidCursor("malformed cursor: {}".format(cursor))
+
+
+def start(items, query):
+    """
+    Save a snapshot of items
+    :param items: the whole (filtered, sorted) result
+    :param query: the parameters the result is for. The snapshot can only be paged through with the same ones
+    :return: the cursor of the first page
+    """
+    snapshot_id = binascii.hexlify(os.urandom(8)).decode('ascii')
+    store = get_store()
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+    with _store_lock:
+        store[(snapshot_id, 'meta')] = {'query': _query_digest(query), 'length': len(items)}
+        for n, chunk in enumerate(chunks):
+            store[(snapshot_id, n)] = chunk
+    return _encode(snapshot_id, 0)
+
+
+def get_page(cursor, query, size):
+    """
+    :param cursor: a cursor returned by start or get_page
+    :param query: the parameters of the query the cursor was started for
+    :param size: number of items in the page
+    :return: (items, the cursor of the next page, or None if this is the last one)
+    """
+    snapshot_id, offset = _decode(cursor)
+    store = get_store()
+    with _store_lock:
+        meta = store.get((snapshot_id, 'meta'))
+    if meta is None:
+        raise InvalidCursor("unknown or expired cursor: {}".format(cursor))
+    if meta['query'] != _query_digest(query):
+        raise InvalidCursor("the cursor is for another query: {}".format(cursor))
+
+    end = min(offset + size, meta['length'])
+    items = []
+    for n in range(offset // CHUNK_SIZE, (end - 1) // CHUNK_SIZE + 1):
+        with _store_lock:
+            chunk = store.get((snapshot_id, n))
+        if chunk is None:
+            raise InvalidCursor("expired cursor: {}".format(cursor))
+        items.extend(chunk[max(offset - n * CHUNK_SIZE, 0):end - n * CHUNK_SIZE])
+    return items, _encode(snapshot_id, end) if end < meta['length'] else None
@@ -0,0 +1,88 @@
+"""
+Filtering of statement lists by keywords and semantic groups (see garbanzo.lookup.filter_statements).
+
+A LabelIndex is built once per list of statements: the lowercased labels of each statement, run together, are
+joined into one text, with the offsets of the statements in it. Each keyword is then searched for in the whole text
+with str.find, and each match mapped back to its statement by bisection. (The fast search of str.find makes this
+quicker than a single pass of a regular expression alternating the keywords, which the re module tries one by one
+at each position.) The semantic groups of each statement are kept as a set.
+
+A Statements list keeps its index (see label_index): the lists cached by lookup.query_statements are Statements,
+so filtering the same cached statements again, e.g. for another page or other keywords, doesn't rebuild it, and the
+index is dropped with the list when it leaves the cache.
+"""
+from bisect import bisect_right
+
+SEPARATOR = "\0"  # between the labels of two statements. Wikidata labels can't contain it
+
+
+class Statements(list):
+    """
+    A list of statements that keeps its LabelIndex once built. The index isn't pickled with it.
+    """
+    __slots__ = ('label_index',)
+
+    def __init__(self, statements=()):
+        super().__init__(statements)
+        self.label_index = None
+
+    def __reduce__(self):
+        return Statements, (list(self),)
+
+
+class LabelIndex:
+
+    def __init__(self, statements):
+        labels = [(x['subject']['name'] + x['predicate']['name'] + x['object']['name']).lower() for x in statements]
+        self.starts = []
+        start = 0
+        for label in labels:
+            self.starts.append(start)
+            start += len(label) + len(SEPARATOR)
+        self.text = SEPARATOR.join(labels)
+        self.groups = [frozenset(x['subject']['semanticGroup'].split() + x['object']['semanticGroup'].split())
+                       for x in statements]
+
+    def match_keywords(self, keywords):
+        """
+        :param keywords: strings, matched ignoring case
+        :return: indexes of the statements whose labels contain any of the keywords, in order
+        """
+        matches = set()
+        if not self.starts:
+            return []
+        for keyword in set(k.lower() for k in keywords):
+            # a keyword with the separator in it matches no label, and could match across two statements
+            if SEPARATOR in keyword:
+                continue
+            pos = self.text.find(keyword)
+            while pos != -1:
+                i = bisect_right(self.starts, pos) - 1
+                matches.add(i)
+                # go on from the next statement: one match is enough
+                if i + 1 == len(self.starts):
+                    break
+                pos = self.text.find(keyword, self.starts[i + 1])
+        return sorted(matches)
+
+    def match_types(self, types, selected=None):
+        """
+        :param types: semantic groups
+        :param selected: indexes of the statements to look at, defaults to all of them
+        :return: indexes of the statements whose subject or object is in any of the semantic groups, in order
+        """
+        types = frozenset(types)
+        selected = range(len(self.groups)) if selected is None else selected
+        return [i for i in selected if not types.isdisjoint(self.groups[i])]
+
+
+def label_index(statements):
+    """
+    :param statements: list of statements, which must not be modified once indexed
+    :return: the LabelIndex of the statements, kept with them if they are Statements
+    """
+    if not isinstance(statements, Statements):
+        return LabelIndex(statements)
+    if statements.label_index is None:
+        statements.label_index = LabelIndex(statements)
+    return statements.label_index
@@ -0,0 +1,203 @@
+"""
+The adjacency of the local statement store (see garbanzo.store) as a compact, memory mapped file, so that the uwsgi
+workers share its pages and opening it parses nothing:
+
+    python -m garbanzo.graph /var/lib/garbanzo/statements.sqlite /var/lib/garbanzo/statements.graph
+
+The entities are interned as integers: their position in the sorted array of their keys (the number of the id, plus
+the kind of entity, Q, P or L, in the high bits). The statements are numbered in the order of their ids. For both
+directions, CSR (compressed sparse row) arrays give the edges of each entity: those of entity i are the positions
+offsets[i] to offsets[i + 1] of the parallel arrays of the other entity, the predicate (P number) and the statement,
+sorted by the other entity. The statement ids are "wds:<subject>$<guid>", the guids being in a string table.
+
+The file is: MAGIC, the length of a json header, the header ({"version": 1, "byteorder": .., "sections": {name:
+[offset, length, typecode]}}), then the arrays, 8 bytes aligned, in the byte order of the machine that built it.
+"""
+import argparse
+import json
+import logging
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+FORMAT_VERSION = 1
+MAGIC = b"GZGRAPH\0"
+KINDS = "QPL"  # the kinds of entities, by key >> KIND_SHIFT
+KIND_SHIFT = 40
+SECTIONS = [('nodes', 'Q'), ('forward_offsets', 'Q'), ('forward_nodes', 'I'), ('forward_predicates', 'I'),
+            ('forward_statements', 'I'), ('reverse_offsets', 'Q'), ('reverse_nodes', 'I'),
+            ('reverse_predicates', 'I'), ('reverse_statements', 'I'), ('guid_offsets', 'Q'), ('guids', 'B')]
+
+logger = logging.getLogger(__name__)
+
+
+def entity_key(entity):
+    """
+    :param entity: e.g. "Q42" or "P31"
+    :return: its integer key, or None if it isn't an entity id that can be interned (e.g. a lexeme form)
+    """
+    kind = KINDS.find(entity[:1])
+    if kind < 0 or not entity[1:].isdigit():
+        return None
+    return (kind << KIND_SHIFT) + int(entity[1:])
+
+
+def entity_id(key):
+    return KINDS[key >> KIND_SHIFT] + str(key & ((1 << KIND_SHIFT) - 1))
+
+
+def build(statements):
+    """
+    :param statements: iterable of (id, s, r, t), sorted by id (e.g. StatementStore.iter_statements())
+    :return: {section name: array}
+    """
+    subjects, objects, predicates = array('Q'), array('Q'), array('I')
+    guid_offsets, guids = array('Q', [0]), bytearray()
+    skipped = 0
+    for id_, s, r, t in statements:
+        s_key, t_key, prefix = entity_key(s), entity_key(t), "wds:{}$".format(s)
+        if s_key is None or t_key is None or not r.startswith("P") or not id_.startswith(prefix):
+            skipped += 1
+            continue
+        subjects.append(s_key)
+        objects.append(t_key)
+        predicates.append(int(r[1:]))
+        guids += id_[len(prefix):].encode('ascii')
+        guid_offsets.append(len(guids))
+    if skipped:
+        logger.info("skipped %d statements between entities that can't be interned", skipped)
+
+    nodes = array('Q', sorted(set(subjects) | set(objects)))
+    index = {key: i for i, key in enumerate(nodes)}
+    subjects = array('I', (index[x] for x in subjects))
+    objects = array('I', (index[x] for x in objects))
+    del index
+
+    sections = {'nodes': nodes, 'guid_offsets': guid_offsets, 'guids': array('B', guids)}
+    for direction, sources, targets in [("forward", subjects, objects), ("reverse", objects, subjects)]:
+        order = sorted(range(len(sources)), key=lambda i: (sources[i], targets[i], i))
+        offsets = array('Q', [0] * (len(nodes) + 1))
+        for i in sources:
+            offsets[i + 1] += 1
+        for i in range(len(nodes)):
+            offsets[i + 1] += offsets[i]
+        sections[direction + '_offsets'] = offsets
+        sections[direction + '_nodes'] = array('I', (targets[i] for i in order))
+        sections[direction + '_predicates'] = array('I', (predicates[i] for i in order))
+        sections[direction + '_statements'] = array('I', order)
+    return sections
+
+
+def save(sections, path):
+    position, layout = 0, {}
+    for name, typecode in SECTIONS:
+        assert sections[name].typecode == typecode
+        layout[name] = [position, len(sections[name]), typecode]
+        position += -(-len(sections[name]) * sections[name].itemsize // 8) * 8
+    header = json.dumps({'version': FORMAT_VERSION, 'byteorder': sys.byteorder, 'sections': layout}).encode('utf-8')
+    header += b" " * (-(len(MAGIC) + 8 + len(header)) % 8)
+    start = len(MAGIC) + 8 + len(header)
+    with open(path, 'wb') as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, _ in SECTIONS:
+            f.seek(start + layout[name][0])
+            sections[name].tofile(f)
+        f.truncate(start + position)
+
+
+class Graph:
+    """
+    A graph file opened with mmap: its arrays are memoryviews of the mapping
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = memoryview(self._mmap)
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("{}: not a statement graph".format(path))
+        length = struct.unpack("<Q", data[len(MAGIC):len(MAGIC) + 8])[0]
+        header = json.loads(data[len(MAGIC) + 8:len(MAGIC) + 8 + length].tobytes().decode('utf-8'))
+        if header.get('version') != FORMAT_VERSION or header.get('byteorder') != sys.byteorder:
+            raise ValueError("{}: unsupported graph version {} ({})".format(path, header.get('version'),
+                                                                          header.get('byteorder')))
+        start = len(MAGIC) + 8 + length
+        for name, (offset, count, typecode) in header['sections'].items():
+            size = count * array(typecode).itemsize
+            setattr(self, name, data[start + offset:start + offset + size].cast(typecode))
+
+    def close(self):
+        for name, _ in SECTIONS:
+            getattr(self, name).release()
+        self._mmap.close()
+
+    def _intern(self, entities):
+        indexes = set()
+        for key in map(entity_key, entities):
+            i = bisect_left(self.nodes, key) if key is not None else len(self.nodes)
+            if i < len(self.nodes) and self.nodes[i] == key:
+                indexes.add(i)
+        return indexes
+
+    def _edges(self, direction, node, others, relations):
+        # positions of the edges of node to others (if any), with one of the relations (if any)
+        offsets, nodes = getattr(self, direction + '_offsets'), getattr(self, direction + '_nodes')
+        lo, hi = offsets[node], offsets[node + 1]
+        if others is None:
+            positions = range(lo, hi)
+        elif len(others) * 8 < hi - lo:
+            # few others: binary search them in the edges, which are sorted by the other node
+            positions = []
+            for other in sorted(others):
+                positions.extend(range(bisect_left(nodes, other, lo, hi), bisect_right(nodes, other, lo, hi)))
+        else:
+            positions = [lo + i for i, x in enumerate(nodes[lo:hi].tolist()) if x in others]
+        if relations is not None:
+            predicates = getattr(self, direction + '_predicates')
+            positions = [i for i in positions if predicates[i] in relations]
+        return positions
+
+    def match(self, s, t=None, relations=None):
+        """
+        Same as StatementStore.match, from the graph
+        :return: list of (id, s, r, t), sorted by id
+        """
+        s = self._intern(s)
+        t = self._intern(t) if t else None
+        relations = set(int(x[1:]) for x in relations) if relations else None
+        rows = {}
+        for direction in ("forward", "reverse"):
+            nodes = getattr(self, direction + '_nodes')
+            predicates = getattr(self, direction + '_predicates')
+            statements = getattr(self, direction + '_statements')
+            for node in s:
+                for i in self._edges(direction, node, t, relations):
+                    subject, object_ = (node, nodes[i]) if direction == "forward" else (nodes[i], node)
+                    rows[statements[i]] = (subject, predicates[i], object_)
+        return [self._row(statement, *rows[statement]) for statement in sorted(rows)]
+
+    def _row(self, statement, subject, predicate, object_):
+        subject = entity_id(self.nodes[subject])
+        guid = self.guids[self.guid_offsets[statement]:self.guid_offsets[statement + 1]].tobytes().decode('ascii')
+        return "wds:{}${}".format(subject, guid), subject, "P{}".format(predicate), entity_id(self.nodes[object_])
+
+
+def main(args=None):
+    from garbanzo.store import StatementStore
+
+    parser = argparse.ArgumentParser(description="Build the adjacency graph file of a local statement store")
+    parser.add_argument('store', help="sqlite file of the store, see garbanzo.ingest")
+    parser.add_argument('path', help="file to write (see GARBANZO_STATEMENT_GRAPH_PATH)")
+    args = parser.parse_args(args)
+    logging.basicConfig(level=logging.INFO)
+
+    sections = build(StatementStore(args.store).iter_statements())
+    save(sections, args.path)
+    print("saved the {} statements between {} entities to {}".format(
+        len(sections['guid_offsets']) - 1, len(sections['nodes']), args.path))
+
+
+if __name__ == '__main__':
+    main()
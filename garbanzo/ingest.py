@@ -0,0 +1,165 @@
+"""
+Load a Wikidata dump (or a subset of one) into a local statement store (see garbanzo.store):
+
+    python -m garbanzo.ingest latest-all.json.gz --store /var/lib/garbanzo/statements.sqlite
+    python -m garbanzo.ingest subset.nt.bz2 --store statements.sqlite --only concepts.txt
+
+Dumps are read as a stream, so they can be larger than memory. The format is guessed from the file name: the JSON
+dump (one entity per line) or N-Triples (the full RDF dump, or any subset of it with the statement, label and
+truthy P31 triples). They can be gzip or bz2 compressed, and - reads stdin.
+
+With --only, only the statements whose subject or object is one of the listed concepts are kept, with the labels and
+types of the entities they are about.
+"""
+import argparse
+import bz2
+import gzip
+import io
+import json
+import re
+import sys
+
+from garbanzo.store import StatementStore
+from garbanzo.utils import always_qid
+
+ENTITY = "http://www.wikidata.org/entity/"
+STATEMENT = "http://www.wikidata.org/entity/statement/"
+PROP_STATEMENT = "http://www.wikidata.org/prop/statement/"
+LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
+DIRECT_P31 = "http://www.wikidata.org/prop/direct/P31"
+ENTITY_PREFIXES = {'item': "Q", 'property': "P", 'lexeme': "L"}
+BATCH_SIZE = 10000  # rows inserted at once
+
+TRIPLE = re.compile(r'<([^>]*)> <([^>]*)> (?:<([^>]*)>|"((?:[^"\\]|\\.)*)"(?:@([\w-]+)|\^\^<[^>]*>)?|_:\S+) \.')
+ESCAPE = re.compile(r'\\(U[0-9A-Fa-f]{8}|u[0-9A-Fa-f]{4}|.)')
+ESCAPES = {'t': '\t', 'b': '\b', 'n': '\n', 'r': '\r', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+
+
+def _unescape(literal):
+    def replace(match):
+        escape = match.group(1)
+        return chr(int(escape[1:], 16)) if escape[0] in 'uU' and len(escape) > 1 else ESCAPES.get(escape, escape)
+
+    return ESCAPE.sub(replace, literal)
+
+
+def _statement(statement_id, r, t):
+    # as lookup._parse_statement: "wds:<subject>$<guid>", only for the statements of items
+    statement_id = "wds:" + statement_id.replace("-", "$", 1)
+    if not statement_id.startswith("wds:Q"):
+        return None
+    return statement_id, statement_id[4:].split("$", 1)[0], r, t
+
+
+def read_json(lines):
+    """
+    :param lines: lines of the JSON dump
+    :return: iterator of ("statement", (id, s, r, t)), ("label", (entity, label)) and ("type", (entity, type))
+    """
+    for line in lines:
+        line = line.strip().rstrip(",")
+        if not line or line in {"[", "]"}:
+            continue
+        entity = json.loads(line)
+        if 'en' in entity.get('labels', {}):
+            yield "label", (entity['id'], entity['labels']['en']['value'])
+        for prop, claims in entity.get('claims', {}).items():
+            # the truthy P31 values: of the best rank, never deprecated
+            best = 'preferred' if any(claim.get('rank') == 'preferred' for claim in claims) else 'normal'
+            for claim in claims:
+                snak = claim['mainsnak']
+                if snak.get('snaktype') != 'value' or snak['datavalue']['type'] != 'wikibase-entityid':
+                    continue
+                value = snak['datavalue']['value']
+                if 'id' not in value:  # older dumps
+                    value['id'] = ENTITY_PREFIXES.get(value.get('entity-type'), "Q") + str(value['numeric-id'])
+                value = value['id']
+                statement = _statement(claim['id'].replace("$", "-", 1), prop, value)
+                if statement:
+                    yield "statement", statement
+                if prop == 'P31' and claim.get('rank') == best:
+                    yield "type", (entity['id'], value)
+
+
+def read_ntriples(lines):
+    """
+    :param lines: lines of an N-Triples dump
+    :return: iterator of ("statement", (id, s, r, t)), ("label", (entity, label)) and ("type", (entity, type))
+    """
+    for line in lines:
+        match = TRIPLE.match(line)
+        if match is None:
+            continue
+        s, p, o, literal, language = match.groups()
+        if p.startswith(PROP_STATEMENT) and s.startswith(STATEMENT) and o and o.startswith(ENTITY):
+            statement = _statement(s[len(STATEMENT):], p[len(PROP_STATEMENT):], o[len(ENTITY):])
+            if statement:
+                yield "statement", statement
+        elif p == LABEL and language == "en" and s.startswith(ENTITY):
+            yield "label", (s[len(ENTITY):], _unescape(literal))
+        elif p == DIRECT_P31 and s.startswith(ENTITY) and o and o.startswith(ENTITY):
+            yield "type", (s[len(ENTITY):], o[len(ENTITY):])
+
+
+def open_dump(path):
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    if path.endswith(".gz"):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith(".bz2"):
+        return bz2.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def ingest(store, records, only=None):
+    """
+    :param store: a StatementStore
+    :param records: from read_json or read_ntriples
+    :param only: set of qids: keep only the statements about them
+    :return: {"statement": n, "label": n, "type": n} rows written
+    """
+    add = {"statement": store.add_statements, "label": store.add_labels, "type": store.add_types}
+    batches = {kind: [] for kind in add}
+    counts = {kind: 0 for kind in add}
+    for kind, row in records:
+        if only is not None and kind == "statement" and row[1] not in only and row[3] not in only:
+            continue
+        batches[kind].append(row)
+        if len(batches[kind]) >= BATCH_SIZE:
+            add[kind](batches[kind])
+            counts[kind] += len(batches[kind])
+            batches[kind] = []
+    for kind, rows in batches.items():
+        add[kind](rows)
+        counts[kind] += len(rows)
+    store.commit()
+    return counts
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Load a Wikidata dump into a local statement store")
+    parser.add_argument('dumps', nargs='+', help="JSON or N-Triples dumps, possibly gzip or bz2 compressed")
+    parser.add_argument('--store', required=True, help="sqlite file of the store (see GARBANZO_STATEMENT_STORE_PATH)")
+    parser.add_argument('--format', choices=['json', 'nt'], help="format of the dumps (default: from the file name)")
+    parser.add_argument('--only', type=argparse.FileType('r'),
+                        help="file with one concept id per line: keep only the statements about these concepts")
+    args = parser.parse_args(args)
+
+    only = None
+    if args.only:
+        only = set(always_qid(line.strip()) for line in args.only if line.strip() and not line.startswith("#"))
+
+    store = StatementStore(args.store)
+    store.db.execute("PRAGMA synchronous = OFF")
+    for path in args.dumps:
+        fmt = args.format or ("json" if ".json" in path else "nt")
+        with open_dump(path) as lines:
+            counts = ingest(store, (read_json if fmt == "json" else read_ntriples)(lines), only)
+        print("{}: {statement} statements, {label} labels, {type} types".format(path, **counts))
+    if only is not None:
+        store.prune()
+    store.create_indexes()
+
+
+if __name__ == '__main__':
+    main()
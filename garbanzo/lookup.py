@@ -1,11 +1,18 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 
-from cachetools import cached, TTLCache
-import requests
+from garbanzo import batching, closure, settings, store, upstream
+from garbanzo.cache import cached, cached_items, lookup_cache, make_cache
+from garbanzo.filtering import Statements, label_index
+from garbanzo.materialized import Materialized
 
-from garbanzo.utils import execute_sparql_query, always_curie, always_qid, get_semgroups_from_qids, \
-    get_semgroups_from_qids, \
-    qid_semgroup, make_frozenset
+from garbanzo.utils import execute_sparql_query, aexecute_sparql_query, always_curie, always_qid, \
+    get_semgroups_from_qids, get_qids_from_semgroups, \
+    qid_semgroup, make_frozenset, sparql_string, iter_sparql_query
 
 from wikicurie import wikicurie
 
@@ -13,6 +20,18 @@ cu = wikicurie.CurieUtil()
 
 CACHE_SIZE = 10000
 CACHE_TIMEOUT_SEC = 300  # 5 min
+WBGETENTITIES_MAX_IDS = 50  # the wikidata api rejects more ids per wbgetentities call
+SEARCH_BATCH_MAX = 50  # nor does it return more results per wbsearchentities call
+
+logger = logging.getLogger(__name__)
+
+# search offset of each page of the semantic group filtered searches: (search, semgroups, pageSize, pageNumber) -> int
+_search_offsets = make_cache('search_offsets', CACHE_SIZE, CACHE_TIMEOUT_SEC)
+_search_offsets_lock = threading.Lock()
+_prefetch_executor = None  # see prefetch_search_page
+_prefetch_executor_pid = None
+_prefetch_slots = None
+_prefetch_lock = threading.Lock()
 
 
 class Claim:
@@ -92,12 +111,34 @@ def parse_claims(wdclaims):
     return claims
 
 
-def getEntities(qids):
-    qids = set(map(always_qid, qids))
+def getEntities(qids, props=None):
+    return upstream.run(agetEntities(qids, props))
+
+
+async def agetEntities(qids, props=None):
+    """
+    Get entities with wbgetentities. The api only takes WBGETENTITIES_MAX_IDS ids per call, so the ids are split
+    into chunks that are fetched concurrently (at most settings.ENTITY_FETCH_CONCURRENCY at a time) and merged
+    :param qids:
+    :param props: restrict the returned entity properties, e.g. 'labels'
+    :return: {qid: entity}
+    """
+    qids = sorted(set(map(always_qid, qids)))
+    chunks = [qids[i:i + WBGETENTITIES_MAX_IDS] for i in range(0, len(qids), WBGETENTITIES_MAX_IDS)]
+    semaphore = asyncio.Semaphore(settings.ENTITY_FETCH_CONCURRENCY)
+    entities = dict()
+    for chunk_entities in await asyncio.gather(*[_agetEntitiesChunk(chunk, props, semaphore) for chunk in chunks]):
+        entities.update(chunk_entities)
+    return entities
+
+
+async def _agetEntitiesChunk(qids, props, semaphore):
     params = {'action': 'wbgetentities', 'ids': "|".join(qids), 'languages': 'en', 'format': 'json'}
-    r = requests.get("https://www.wikidata.org/w/api.php", params=params)
+    if props:
+        params['props'] = props
+    async with semaphore:
+        r = await upstream.aget(upstream.WIKIDATA_API, params=params)
     print(r.url)
-    r.raise_for_status()
     response_json = r.json()
     if 'error' in response_json:
         raise ValueError(response_json)
@@ -153,19 +194,16 @@ def get_types(claims):
     return list(types)
 
 
-@cached(TTLCache(CACHE_SIZE, CACHE_TIMEOUT_SEC))
 def getConceptLabel(qid):
     return getConceptLabels((qid,))[qid]
 
 
-@cached(TTLCache(CACHE_SIZE, CACHE_TIMEOUT_SEC))
+@cached_items(**lookup_cache('getConceptLabels', CACHE_SIZE, CACHE_TIMEOUT_SEC), key=always_qid)
 def getConceptLabels(qids):
-    qids = "|".join({qid.replace("wd:", "") if qid.startswith("wd:") else qid for qid in qids})
-    params = {'action': 'wbgetentities', 'ids': qids, 'languages': 'en', 'format': 'json', 'props': 'labels'}
-    r = requests.get("https://www.wikidata.org/w/api.php", params=params)
-    print(r.url)
-    r.raise_for_status()
-    wd = r.json()['entities']
+    """
+    Cached per entity: only the labels that aren't cached are fetched
+    """
+    wd = getEntities(qids, props='labels')
     return {k: v['labels']['en']['value'] for k, v in wd.items()}
 
 
@@ -173,9 +211,10 @@ def getConcept(qid):
     return getConcepts((qid,))[always_curie(qid)]
 
 
-@cached(TTLCache(10000, 300))  # expire after 5 min
+@cached_items(**lookup_cache('getConcepts', 10000, 300), key=always_curie)  # expire after 5 min
 def getConcepts(qids):
     """
+    Cached per entity: only the concepts that aren't cached are fetched
     test case: Q417169 (PLAU is both gene and pharmaceutical drug)
     Q27551855 (protein)
     :param qids:
@@ -201,31 +240,96 @@ def getConcepts(qids):
     return dd
 
 
-@cached(TTLCache(CACHE_SIZE, CACHE_TIMEOUT_SEC))
 def get_all_types():
     """
     Get all semantic group types, and their counts.
+    The counts are served from memory, and recomputed in the background every settings.TYPES_REFRESH_SEC
     :return: {"id": [], "frequency": xx} for all entity types in garbanzo
     """
-    agg = {}
-    for (entity_id, group_name) in qid_semgroup.items():
-        if isinstance(group_name, str):
-            group_name = [group_name]
-        for group in group_name:
-            if entity_id != 'Q5':  # Q5 = human, can't do a count
-                query_str = """SELECT (COUNT (DISTINCT ?type) AS ?count) WHERE {{?type wdt:P31 wd:{0}}}""".format(
-                    entity_id)
-                agg[entity_id] = {
-                    'sum': int(execute_sparql_query(query_str)['results']['bindings'][0]['count']['value']),
-                    'group': group}
-
-    # ret = [{'id': '{} wd:{}'.format(v['group'], k), 'frequency': v['sum']} for k,v in agg.items()]
-    ret = [{'id': 'wd:{}'.format(k),
-            'frequency': v['sum']} for k, v in agg.items()]
+    return all_types.get()
+
+
+def count_all_types():
+    """
+    Count the instances of every type, with one aggregated query.
+    If that one fails (e.g. times out), each type is counted with its own query, concurrently
+    """
+    type_qids = sorted(qid for qid in qid_semgroup if qid != 'Q5')  # Q5 = human, can't do a count
+    try:
+        counts = _count_types(type_qids)
+    except Exception:
+        logger.warning("counting all types at once failed", exc_info=True)
+        counts = upstream.run(_acount_types_each(type_qids))
+
+    ret = [{'id': 'wd:{}'.format(qid),
+            'frequency': counts.get(qid, 0)} for qid in type_qids]
     return ret
 
 
-@cached(TTLCache(CACHE_SIZE, CACHE_TIMEOUT_SEC))
+def _count_types(type_qids):
+    query_str = """SELECT ?type (COUNT (DISTINCT ?item) AS ?count) WHERE {{
+      VALUES ?type {{ {} }}
+      ?item wdt:P31 ?type
+    }} GROUP BY ?type""".format(" ".join(map(always_curie, type_qids)))
+    d = execute_sparql_query(query_str)['results']['bindings']
+    return {x['type']['value'].replace("http://www.wikidata.org/entity/", ""): int(x['count']['value']) for x in d}
+
+
+async def _acount_types_each(type_qids):
+    async def count(qid):
+        query_str = """SELECT (COUNT (DISTINCT ?type) AS ?count) WHERE {{?type wdt:P31 wd:{0}}}""".format(qid)
+        return int((await aexecute_sparql_query(query_str))['results']['bindings'][0]['count']['value'])
+
+    counts = await asyncio.gather(*[count(qid) for qid in type_qids])
+    return dict(zip(type_qids, counts))
+
+
+all_types = Materialized('types', count_all_types, settings.TYPES_REFRESH_SEC)
+
+
+def query_predicates():
+    """
+    Get all wikidata properties, with their label, description, aliases and property type
+    :return: list of {"id", "name", "definition", "aliases", "ptype"}
+    """
+    # Possible types: {'CommonsMedia', 'Time', 'Quantity', 'WikibaseProperty', 'WikibaseItem', 'GlobeCoordinate',
+    # 'String', 'ExternalId', 'Math', 'Monolingualtext', 'TabularData', 'Url', 'GeoShape'}
+    query = """SELECT ?p ?pt ?pLabel ?d ?aliases WHERE {
+      {
+        SELECT ?p ?pt ?d (GROUP_CONCAT(DISTINCT ?alias; separator="|") as ?aliases) WHERE {
+          ?p wikibase:propertyType ?pt .
+          OPTIONAL {?p skos:altLabel ?alias FILTER (LANG (?alias) = "en")}
+          OPTIONAL {?p schema:description ?d FILTER (LANG (?d) = "en") .}
+        } GROUP BY ?p ?pt ?d
+      }
+      SERVICE wikibase:label { bd:serviceParam wikibase:language "[AUTO_LANGUAGE],en". }
+    }"""
+    results = execute_sparql_query(query)['results']['bindings']
+    results = [{k: v['value'] for k, v in item.items()} for item in results]
+
+    items = [{'id': "wd:" + x['p'].split("/")[-1],
+              'name': x['pLabel'],
+              'definition': x.get("d", ""),
+              'aliases': x['aliases'].split("|") if x['aliases'] else [],
+              'ptype': x['pt'].replace("http://wikiba.se/ontology#", "")} for x in results]
+    # note: 'aliases' and 'ptype' are not in the official spec!
+    # sorted so that the body (and so its etag) only changes when the predicates do
+    return sorted(items, key=lambda x: x['id'])
+
+
+def get_predicates():
+    """
+    Get the predicate catalog as a json body, ready to be sent.
+    It is served from memory, and recomputed in the background every settings.PREDICATES_REFRESH_SEC
+    :return: (json encoded list of predicates, etag)
+    """
+    return predicates.get_body()
+
+
+predicates = Materialized('predicates', query_predicates, settings.PREDICATES_REFRESH_SEC)
+
+
+@cached(**lookup_cache('get_equiv_item', CACHE_SIZE, CACHE_TIMEOUT_SEC))
 def get_equiv_item(curie):
     """
     From a curie, get the wikidata item
@@ -246,27 +350,101 @@ def get_equiv_item(curie):
     return equiv_qids
 
 
+async def aget_equiv_item(curie):
+    return await upstream.to_thread(get_equiv_item, curie)
+
+
+def get_equiv_items(curies):
+    """
+    get_equiv_item for many curies, looked up concurrently
+    :param curies:
+    :return: {curie: [qids]}
+    """
+    curies = list(set(curies))
+    results = upstream.run(upstream.gather(*[aget_equiv_item(curie) for curie in curies]))
+    return dict(zip(curies, results))
+
+
 @make_frozenset
-@cached(TTLCache(100, CACHE_TIMEOUT_SEC))
+@cached(**lookup_cache('query_statements', 100, CACHE_TIMEOUT_SEC))
 def query_statements(s, t=None, relations=None):
-    f = _query_statements(s, t, relations, "f")
-    r = _query_statements(s, t, relations, "r")
-    d = f + r
-    seen = set()
+    # cached with the index filter_statements builds for them (see garbanzo.filtering.Statements)
+    return Statements(upstream.run(aquery_statements(s, t, relations)))
+
+
+async def aquery_statements(s, t=None, relations=None, single_query=None):
+    """
+    The statements of both directions are queried at once, or with single_query off, by one query per direction run
+    concurrently. Large sets of s, t or relations are split into batches run concurrently (see garbanzo.batching)
+    With a local statement store (see garbanzo.store), they are read from it instead.
+    :param single_query: defaults to settings.STATEMENTS_SINGLE_QUERY
+    """
+    statement_store = store.get_store()
+    if statement_store is not None:
+        return await upstream.to_thread(statement_store.query_statements, s, t, relations)
+    if single_query is None:
+        single_query = settings.STATEMENTS_SINGLE_QUERY
+
+    async def query(s, t, relations):
+        if single_query:
+            return await _aquery_statements(s, t, relations, "fr")
+        f, r = await asyncio.gather(_aquery_statements(s, t, relations, "f"),
+                                    _aquery_statements(s, t, relations, "r"))
+        return f + r
+
+    return _merge_statements(await _arun_statement_batches(query, s, t, relations))
+
+
+async def _arun_statement_batches(query, s, t=None, relations=None):
+    batches = batching.batches(statements_batch_size.get(), s, t, relations)
+    return await batching.arun_batches(query, batches, statements_batch_size, settings.STATEMENTS_BATCH_CONCURRENCY)
+
+
+def _merge_statements(results):
     # de duplicate based on ids
-    d = [x for x in d if not (x['id'] in seen or seen.add(x['id']))]
-    d = sorted(d, key=lambda x: x['id'])
-    return d
+    seen = set()
+    d = [x for result in results for x in result if not (x['id'] in seen or seen.add(x['id']))]
+    return sorted(d, key=lambda x: x['id'])
+
+
+statements_batch_size = batching.AdaptiveBatchSize(settings.STATEMENTS_BATCH_SIZE, settings.STATEMENTS_BATCH_MIN,
+                                                   settings.STATEMENTS_BATCH_MAX, settings.STATEMENTS_BATCH_TARGET_SEC)
 
 
 def _query_statements(s, t=None, relations=None, direction="f"):
+    return upstream.run(_aquery_statements(s, t, relations, direction))
+
+
+async def _aquery_statements(s, t=None, relations=None, direction="f"):
+    d = (await aexecute_sparql_query(_statements_query(s, t, relations, direction)))['results']['bindings']
+    return _parse_statements(d)
+
+
+def _statements_query(s, t=None, relations=None, direction="f"):
     """
     if direction = f (forward), s is source, t is target
     if direction = r (reverse), s and t are reversed
+    if direction = fr, either one (a statement matching both ways is returned once, as the rows are grouped by id)
     if t is not given, target is unconstrained
     if relations is not given, relations are unconstrained
     """
-    assert direction in {"f", "r"}, "direction must be 'f' or 'r'"
+    query_str = """
+    SELECT ?s ?sLabel ?r ?rLabel ?t ?tLabel ?id (GROUP_CONCAT(DISTINCT ?stype) as ?stypes) (GROUP_CONCAT(DISTINCT ?ttype) as ?ttypes) WHERE {{
+      {values}
+      ?s ?propertyclaim ?id .
+      ?r wikibase:claim ?propertyclaim .
+      ?id ?b ?t .
+      OPTIONAL {{?s wdt:P31 ?stype}}
+      OPTIONAL {{?t wdt:P31 ?ttype}}
+      FILTER(regex(str(?b), "http://www.wikidata.org/prop/statement" ))
+      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en" }}
+    }} GROUP BY ?s ?sLabel ?r ?rLabel ?t ?tLabel ?id ORDER BY ?id"""
+    return query_str.format(values=_statements_values(s, t, relations, direction))
+
+
+def _statements_values(s, t=None, relations=None, direction="f"):
+    # the VALUES clauses constraining the ?s ?r ?t of a statements query
+    assert direction in {"f", "r", "fr"}, "direction must be 'f', 'r' or 'fr'"
     s = set(map(always_curie, s))
     t = set(map(always_curie, t)) if t else set()
     relations = set(map(always_curie, relations)) if relations else set()
@@ -275,79 +453,196 @@ def _query_statements(s, t=None, relations=None, direction="f"):
     t_str = " ".join(t)
     r_str = " ".join(relations)
 
-    if direction == "r":
-        s_str, t_str = t_str, s_str
+    def values(*var_values):
+        return " ".join("values " + var + " {" + x + "}" for var, x in var_values if x)
 
-    query_str = """
-    SELECT ?s ?sLabel ?r ?rLabel ?t ?tLabel ?id (GROUP_CONCAT(?stype) as ?stypes) (GROUP_CONCAT(?ttype) as ?ttypes) WHERE {{
-      {source_filter}
-      {target_filter}
-      {relation_filter}
-      ?s ?propertyclaim ?id .
-      ?r wikibase:claim ?propertyclaim .
-      ?id ?b ?t .
-      OPTIONAL {{?s wdt:P31 ?stype}}
-      OPTIONAL {{?t wdt:P31 ?ttype}}
-      FILTER(regex(str(?b), "http://www.wikidata.org/prop/statement" ))
-      SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en" }}
-    }} GROUP BY ?s ?sLabel ?r ?rLabel ?t ?tLabel ?id"""
-    query_str = query_str.format(source_filter="values ?s {" + s_str + "}" if s_str else "",
-                                 target_filter="values ?t {" + t_str + "}" if t_str else "",
-                                 relation_filter="values ?r {" + r_str + "}" if r_str else "")
-    d = execute_sparql_query(query_str)['results']['bindings']
-    results = [{k: v['value'] for k, v in item.items()} for item in d]
+    forward = values(("?s", s_str), ("?t", t_str))
+    reverse = values(("?s", t_str), ("?t", s_str))
+    nodes = {"f": forward, "r": reverse, "fr": "{ " + forward + " } UNION { " + reverse + " }"}[direction]
+    return (nodes + " " + values(("?r", r_str))).strip()
+
+
+def _parse_statements(bindings):
+    statements = (_parse_statement({k: v['value'] for k, v in item.items()}) for item in bindings)
+    return [x for x in statements if x is not None]
+
+
+def _parse_statement(result):
+    """
+    :param result: a result row, {variable: value}
+    :return: the statement, or None if it isn't between two items
+    """
     # remove non item statements
-    results = [x for x in results if
-               "http://www.wikidata.org/entity/" in x['s'] and "http://www.wikidata.org/entity/" in x['t']]
-    for result in results:
-        result['s'] = result['s'].replace("http://www.wikidata.org/entity/", "wd:")
-        result['r'] = result['r'].replace("http://www.wikidata.org/entity/", "wd:")
-        result['t'] = result['t'].replace("http://www.wikidata.org/entity/", "wd:")
-        result['id'] = result['id'].replace("http://www.wikidata.org/entity/statement/", "wds:").replace("-", "$", 1)
-        sType = [x.replace("http://www.wikidata.org/entity/", "wd:") for x in result['stypes'].split(" ")] if result[
-            'stypes'] else []
-        tType = [x.replace("http://www.wikidata.org/entity/", "wd:") for x in result['ttypes'].split(" ")] if result[
-            'ttypes'] else []
-        result['sSemanticGroup'] = " ".join(get_semgroups_from_qids(sType)) if sType else ""
-        result['tSemanticGroup'] = " ".join(get_semgroups_from_qids(tType)) if tType else ""
-    results = [x for x in results if x['id'].startswith("wds:Q")]
-    data = [{'id': s['id'],
-             'subject': {'id': s['s'], 'name': s['sLabel'],
-                         'semanticGroup': s['sSemanticGroup']},
-             'predicate': {'id': s['r'], 'name': s['rLabel']},
-             'object': {'id': s['t'], 'name': s['tLabel'],
-                        'semanticGroup': s['tSemanticGroup']},
-             } for s in results]
-    #if direction == "r":
-    #    for d in data:
-    #        d['subject'], d['object'] = d['object'], d['subject']
-
-    return data
+    if not ("http://www.wikidata.org/entity/" in result['s'] and "http://www.wikidata.org/entity/" in result['t']):
+        return None
+    result['id'] = result['id'].replace("http://www.wikidata.org/entity/statement/", "wds:").replace("-", "$", 1)
+    if not result['id'].startswith("wds:Q"):
+        return None
+    result['s'] = result['s'].replace("http://www.wikidata.org/entity/", "wd:")
+    result['r'] = result['r'].replace("http://www.wikidata.org/entity/", "wd:")
+    result['t'] = result['t'].replace("http://www.wikidata.org/entity/", "wd:")
+    sType = [x.replace("http://www.wikidata.org/entity/", "wd:") for x in result['stypes'].split(" ")] if result.get(
+        'stypes') else []
+    tType = [x.replace("http://www.wikidata.org/entity/", "wd:") for x in result['ttypes'].split(" ")] if result.get(
+        'ttypes') else []
+    sSemanticGroup = " ".join(get_semgroups_from_qids(sType)) if sType else ""
+    tSemanticGroup = " ".join(get_semgroups_from_qids(tType)) if tType else ""
+    return {'id': result['id'],
+            'subject': {'id': result['s'], 'name': result['sLabel'],
+                        'semanticGroup': sSemanticGroup},
+            'predicate': {'id': result['r'], 'name': result['rLabel']},
+            'object': {'id': result['t'], 'name': result['tLabel'],
+                       'semanticGroup': tSemanticGroup},
+            }
+
+
+def get_statements_page(s, t=None, relations=None, keywords=None, types=None, offset=0, limit=10):
+    """
+    A page of query_and_filter_statements, sorted by id.
+    The filtering and paging are done by wikidata (see query_statements_page), unless all the statements are cached
+    already or read from the local store, in which case they are filtered here.
+    :param offset: index of the first statement of the page
+    :param limit: number of statements in the page
+    :return: list of statements
+    """
+    if store.get_store() is not None or make_frozenset(query_statements.cache_get)(s, t, relations) is not None:
+        return query_and_filter_statements(s, t, relations, keywords, types)[offset:offset + limit]
+    return query_statements_page(frozenset(s), frozenset(t) if t else None,
+                                 frozenset(relations) if relations else None, frozenset(keywords) if keywords else None,
+                                 frozenset(types) if types else None, offset, limit)
 
 
-def filter_statements(datapage, keywords=None, types=None):
-    # filter results using the keywords (a list of strings)
-    # types is a list of strings
+@cached(**lookup_cache('query_statements_page', 1000, CACHE_TIMEOUT_SEC))
+def query_statements_page(s, t=None, relations=None, keywords=None, types=None, offset=0, limit=10):
+    return upstream.run(aquery_statements_page(s, t, relations, keywords, types, offset, limit))
+
+
+async def aquery_statements_page(s, t=None, relations=None, keywords=None, types=None, offset=0, limit=10,
+                                 single_query=None):
+    """
+    The page of the statements of both directions is queried at once, or with single_query off (or when s, t or
+    relations are split into batches), the first offset + limit statements of each direction (and batch) are queried
+    concurrently: the page of the merged statements is among them
+    :param single_query: defaults to settings.STATEMENTS_SINGLE_QUERY
+    """
+    if single_query is None:
+        single_query = settings.STATEMENTS_SINGLE_QUERY
+    if single_query and len(batching.batches(statements_batch_size.get(), s, t, relations)) == 1:
+        return await _aquery_statements_page(s, t, relations, keywords, types, "fr", offset=offset, limit=limit)
+
+    async def query(s, t, relations):
+        if single_query:
+            return await _aquery_statements_page(s, t, relations, keywords, types, "fr", limit=offset + limit)
+        f, r = await asyncio.gather(
+            _aquery_statements_page(s, t, relations, keywords, types, "f", limit=offset + limit),
+            _aquery_statements_page(s, t, relations, keywords, types, "r", limit=offset + limit))
+        return f + r
+
+    return _merge_statements(await _arun_statement_batches(query, s, t, relations))[offset:offset + limit]
+
+
+async def _aquery_statements_page(s, t=None, relations=None, keywords=None, types=None, direction="f", offset=0,
+                                  limit=10):
+    query_str = _statements_page_query(s, t, relations, keywords, types, direction, offset, limit)
+    d = (await aexecute_sparql_query(query_str))['results']['bindings']
+    return _parse_statements(d)
+
+
+def _statements_page_query(s, t=None, relations=None, keywords=None, types=None, direction="f", offset=0, limit=None,
+                           ordered=True):
+    """
+    Like _statements_query, filtered as filter_statements(keywords, types) would, ordered by id (unless not ordered:
+    the endpoint then sends the first rows before it has found the last ones), and paged (all the statements from
+    offset if limit is None).
+    The labels are filtered on outside of the subquery that gets them from the label service.
+    Statement ids sort the same as their wds: curies, as the first "-" of an id and the "$" replacing it both sort
+    before the digits of the subject qid.
+    """
+    query_str = """
+    SELECT ?s ?sLabel ?r ?rLabel ?t ?tLabel ?id ?stypes ?ttypes WHERE {{
+      {{
+        SELECT ?s ?sLabel ?r ?rLabel ?t ?tLabel ?id (GROUP_CONCAT(DISTINCT ?stype) as ?stypes) (GROUP_CONCAT(DISTINCT ?ttype) as ?ttypes) WHERE {{
+          {values}
+          ?s ?propertyclaim ?id .
+          ?r wikibase:claim ?propertyclaim .
+          ?id ?b ?t .
+          OPTIONAL {{?s wdt:P31 ?stype}}
+          OPTIONAL {{?t wdt:P31 ?ttype}}
+          FILTER(regex(str(?b), "http://www.wikidata.org/prop/statement" ))
+          FILTER(CONTAINS(STR(?s), "http://www.wikidata.org/entity/") && CONTAINS(STR(?t), "http://www.wikidata.org/entity/"))
+          FILTER(STRSTARTS(STR(?id), "http://www.wikidata.org/entity/statement/Q"))
+          {type_filter}
+          SERVICE wikibase:label {{ bd:serviceParam wikibase:language "en" }}
+        }} GROUP BY ?s ?sLabel ?r ?rLabel ?t ?tLabel ?id
+      }}
+      {keyword_filter}
+    }} {order} {limit} OFFSET {offset}"""
+    type_filter = ""
+    if types:
+        # with the subclass closure loaded, the types of a semantic group are the subclasses of its root types
+        path = "wdt:P31/wdt:P279*" if closure.index is not None else "wdt:P31"
+        type_filter = "FILTER EXISTS {{ VALUES ?gtype {{ {types} }} " \
+                      "{{ ?s {path} ?gtype }} UNION {{ ?t {path} ?gtype }} }}"
+        type_filter = type_filter.format(types=" ".join(map(always_curie, get_qids_from_semgroups(types))), path=path)
+    keyword_filter = ""
     if keywords:
-        assert not isinstance(keywords, str)
-        datapage2 = []
-        for dp in datapage:
-            # treat it as one string
-            this_labels = dp['subject']['name'] + dp['predicate']['name'] + dp['object']['name']
-            # ignore case
-            this_labels = this_labels.lower()
-            if any(k.lower() in this_labels for k in keywords):
-                datapage2.append(dp)
+        # filter_statements matches the keywords against the labels run together
+        keyword_filter = "FILTER({})".format(" || ".join(
+            'CONTAINS(LCASE(CONCAT(?sLabel, ?rLabel, ?tLabel)), {})'.format(sparql_string(k.lower()))
+            for k in sorted(keywords)))
+    return query_str.format(values=_statements_values(s, t, relations, direction), type_filter=type_filter,
+                            keyword_filter=keyword_filter, order="ORDER BY ?id" if ordered else "",
+                            limit="LIMIT {}".format(int(limit)) if limit is not None else "",
+                            offset=int(offset))
+
 
-        datapage = datapage2
+def iter_statements(s, t=None, relations=None, keywords=None, types=None):
+    """
+    query_and_filter_statements, as an iterator of the statements as they are read from the SPARQL response, so that
+    the first ones can be sent before the last ones are read and all of them are never in memory at once.
+    Both directions are read from one query, which does the filtering, in no particular order: sorting them would make
+    the endpoint read all of them before sending the first one. Large sets of s, t or relations are split into batches queried one after the other.
+    The (first) query is sent (and its errors raised) by this call.
+    With a local statement store, the statements are read from it at once.
+    """
+    if store.get_store() is not None:
+        return iter(query_and_filter_statements(s, t, relations, keywords, types))
+    batches = batching.batches(statements_batch_size.get(), s, t, relations)
+    queries = [_statements_page_query(*batch, keywords=keywords, types=types, direction="fr", ordered=False)
+               for batch in batches]
+    return _iter_statements(iter_sparql_query(queries[0]), queries[1:])
 
+
+def _iter_statements(rows, queries):
+    seen = set()  # ids of the statements of the previous batches, when there are several
+    for query in [None] + queries:
+        if query is not None:
+            rows = iter_sparql_query(query)
+        for statement in map(_parse_statement, rows):
+            if statement is None or (queries and (statement['id'] in seen or seen.add(statement['id']))):
+                continue
+            yield statement
+
+
+def filter_statements(datapage, keywords=None, types=None):
+    """
+    :param datapage: list of statements. Filtering it indexes it (see garbanzo.filtering): it must not be modified
+    :param keywords: strings. A statement matches if the labels of its subject, predicate and object, run together,
+    contain any of them, ignoring case
+    :param types: semantic groups. A statement matches if its subject or object is in any of them
+    :return: the statements matching both
+    """
+    if not keywords and not types:
+        return datapage
+    index = label_index(datapage)
+    selected = None
+    if keywords:
+        assert not isinstance(keywords, str)
+        selected = index.match_keywords(keywords)
     if types:
         assert not isinstance(types, str)
-        datapage = [x for x in datapage if
-                    any(t in x['subject']['semanticGroup'] + x['object']['semanticGroup'] for t in
-                        types)]
-
-    return datapage
+        selected = index.match_types(types, selected)
+    return [datapage[i] for i in selected]
 
 
 def query_and_filter_statements(s, t=None, relations=None, keywords=None, types=None):
@@ -357,47 +652,181 @@ def query_and_filter_statements(s, t=None, relations=None, keywords=None, types=
     return filter_statements(datapage, keywords=keywords, types=types)
 
 
+def get_statements_batch(queries):
+    """
+    The statements pages of many queries at once (see query_statements_batch)
+    :param queries: list of (s, t, relations, keywords, types, offset, limit)
+    :return: list of the statements pages, one per query
+    """
+    datapages = query_statements_batch([query[:3] for query in queries])
+    return [filter_statements(datapage, keywords, types)[offset:offset + limit]
+            for datapage, (_, _, _, keywords, types, offset, limit) in zip(datapages, queries)]
+
+
+def query_statements_batch(queries):
+    """
+    query_statements for many queries at once. The queries not cached yet that have the same t and relations are
+    merged into one query with all their s, the merged queries are run concurrently, and their statements are split
+    back to each query, which caches them as its own.
+    :param queries: list of (s, t, relations)
+    :return: list of the statements of each query
+    """
+    queries = [tuple(frozenset(x) if x else None for x in query) for query in queries]
+    results = {query: query_statements.cache_get(*query) if query[0] else [] for query in set(queries)}
+    merged = {}
+    for s, t, relations in (query for query, result in results.items() if result is None):
+        merged.setdefault((t, relations), set()).update(s)
+    if merged:
+        statements = upstream.run(_aquery_statements_merged(merged))
+        for query in (query for query, result in results.items() if result is None):
+            s, t, relations = query
+            results[query] = Statements(_select_statements(statements[(t, relations)], s, t))
+            query_statements.cache_set(results[query], *query)
+    return [results[query] for query in queries]
+
+
+async def _aquery_statements_merged(merged):
+    keys = list(merged)
+    results = await asyncio.gather(*[aquery_statements(frozenset(merged[key]), *key) for key in keys])
+    return dict(zip(keys, results))
+
+
+def _select_statements(statements, s, t=None):
+    # the statements of a merged query that are between s and t (if any), in either direction
+    s = set(map(always_curie, s))
+    t = set(map(always_curie, t)) if t else None
+
+    def match(source, target):
+        return source in s and (t is None or target in t)
+
+    return [x for x in statements if match(x['subject']['id'], x['object']['id']) or
+            match(x['object']['id'], x['subject']['id'])]
+
+
 def search_wikidata(keywords, semgroups=None, pageNumber=1, pageSize=10):
-    # keywords = ['night', 'blindness']
-    # keywords = ['PLAU']
-    # semgroups = ['CHEM', 'DISO']
-    # pageSize = 10
-    # pageNumber = 1
+    """
+    The concepts found by the wikidata search for the keywords, in its order.
+
+    With semgroups, only the concepts of these semantic groups are kept, and a page is filled from as many search
+    batches as needed (up to settings.SEARCH_MAX_BATCHES): each page starts right after the last concept of the
+    previous one, whose search offset is remembered, and the next page is prefetched in the background so that the
+    client paging through the results finds it in the caches.
+    :param keywords: list of keywords
+    :param semgroups: list of semantic group codes
+    :param pageNumber: 1-based
+    :param pageSize:
+    :return: list of concept dicts (see getConcepts)
+    """
+    search = ' '.join(keywords)
+    semgroups = frozenset(semgroups) if semgroups else frozenset()
+    if not semgroups:
+        return _fill_search_page(search, semgroups, (pageNumber - 1) * pageSize, pageSize, pageSize)[0]
+
+    page, next_offset = _search_page(search, semgroups, pageNumber, pageSize)
+    if next_offset is not None and settings.SEARCH_PREFETCH:
+        prefetch_search_page(search, semgroups, pageNumber + 1, pageSize)
+    return page
 
-    semgroups = semgroups if semgroups else []
+
+@cached(**lookup_cache('search_entities', CACHE_SIZE, CACHE_TIMEOUT_SEC))
+def search_entities(search, offset=0, limit=SEARCH_BATCH_MAX):
+    """
+    A batch of wbsearchentities results
+    :param search: the search string
+    :param offset: of the first result
+    :param limit: number of results, at most SEARCH_BATCH_MAX
+    :return: (curies of the items found, whether the search has more results)
+    """
     params = {'action': 'wbsearchentities',
               'language': 'en',
-              'search': ' '.join(keywords),
+              'search': search,
               'type': "item",
               'format': 'json',
-              'limit': pageSize,
-              'continue': (pageNumber - 1) * pageSize}
-    r = requests.get("https://www.wikidata.org/w/api.php", params=params)
-    r.raise_for_status()
-    d = r.json()
-    dataPage = d['search']
-    for item in dataPage:
-        item['id'] = "wd:" + item['id']
-        del item['repository']
-        del item['concepturi']
-    items = [x['id'] for x in dataPage]
-    print("items: {}".format(items))
-
-    if not items:
-        return []
+              'limit': limit,
+              'continue': offset}
+    d = upstream.get_wikidata_api(params)
+    return ["wd:" + x['id'] for x in d['search']], 'search-continue' in d
 
-    # get detailed info about the found concepts
-    dataPage_dict = getConcepts(tuple(items))
 
-    # reorder dataPage based on the original order from wd
-    dataPage = [dataPage_dict[x] for x in items]
-
-    print("semgroups: {}".format(semgroups))
-    if semgroups:
-        dataPage = [item for item in dataPage if item['semanticGroup'] and (
-            any(item_sg in semgroups for item_sg in item['semanticGroup'].split(" ")))]
-
-    return dataPage
+def _search_page(search, semgroups, pageNumber, pageSize):
+    """
+    Fill a page of filtered search results, starting from the nearest page before it whose offset is known
+    :return: (concepts of the page, search offset of the next page or None if there are no more results)
+    """
+    number = pageNumber
+    with _search_offsets_lock:
+        while number > 1 and (search, semgroups, pageSize, number) not in _search_offsets:
+            number -= 1
+        offset = _search_offsets[(search, semgroups, pageSize, number)] if number > 1 else 0
+
+    while True:
+        page, next_offset = _fill_search_page(search, semgroups, offset, pageSize, SEARCH_BATCH_MAX)
+        if next_offset is None:
+            return (page, None) if number == pageNumber else ([], None)
+        with _search_offsets_lock:
+            _search_offsets[(search, semgroups, pageSize, number + 1)] = next_offset
+        if number == pageNumber:
+            return page, next_offset
+        number, offset = number + 1, next_offset
+
+
+def _fill_search_page(search, semgroups, offset, pageSize, batch_size):
+    """
+    Fill a page with the concepts of the semgroups (all of them if empty) found by the search from offset on
+    :return: (concepts of the page, search offset of the next page or None if there are no more results)
+    """
+    page = []
+    for _ in range(max(settings.SEARCH_MAX_BATCHES, 1)):
+        items, more = search_entities(search, offset, batch_size)
+        concepts = getConcepts(tuple(items)) if items else {}
+        for i, item in enumerate(items):
+            concept = concepts.get(item)
+            if concept is None or semgroups and (
+                    not concept['semanticGroup'] or semgroups.isdisjoint(concept['semanticGroup'].split(" "))):
+                continue
+            page.append(concept)
+            if len(page) == pageSize:
+                return page, offset + i + 1 if more or i + 1 < len(items) else None
+        if not more:
+            return page, None
+        offset += len(items)
+    return page, offset
+
+
+def prefetch_search_page(search, semgroups, pageNumber, pageSize):
+    """
+    Fill a page of filtered search results in the background, on a pool of its own so that the search traffic never
+    delays the cache refreshes. The prefetch is dropped when settings.SEARCH_PREFETCH_WORKERS of them are already
+    running.
+    :return: the Future of _search_page, or None if the prefetch was dropped
+    """
+    global _prefetch_executor, _prefetch_executor_pid, _prefetch_slots
+    pid = os.getpid()
+    if _prefetch_executor_pid != pid:
+        with _prefetch_lock:
+            if _prefetch_executor_pid != pid:
+                workers = max(settings.SEARCH_PREFETCH_WORKERS, 1)
+                _prefetch_executor = ThreadPoolExecutor(max_workers=workers)
+                _prefetch_slots = threading.BoundedSemaphore(workers)
+                _prefetch_executor_pid = pid
+    slots = _prefetch_slots
+    if not slots.acquire(blocking=False):
+        return None
+
+    def prefetch():
+        try:
+            return _search_page(search, semgroups, pageNumber, pageSize)
+        finally:
+            slots.release()
+
+    future = _prefetch_executor.submit(prefetch)
+    future.add_done_callback(_log_prefetch_error)
+    return future
+
+
+def _log_prefetch_error(future):
+    if future.exception() is not None:
+        logger.warning("search page prefetch failed: %r", future.exception())
 
 
 def get_concept_details(qid):
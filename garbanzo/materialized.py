@@ -0,0 +1,105 @@
+"""
+Values that are expensive to compute but change slowly (e.g. the type counts for /types) are materialized: they are
+kept in memory, recomputed in the background every so often, and saved to a file so that a restarted worker can
+serve them right away.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from garbanzo import settings
+from garbanzo.cache import private_dir
+
+logger = logging.getLogger(__name__)
+
+
+class Materialized:
+    """
+    A value computed by loader(), served from memory. Once first requested, it is recomputed every interval
+    seconds by a background thread of the worker process; if that fails, the previous value keeps being served.
+    The value must be json serializable: it is saved to <settings.MATERIALIZED_DIR>/<name>.json, and its json
+    encoding is kept with an etag so that it can be sent as a response body as is (see get_body)
+    """
+
+    def __init__(self, name, loader, interval):
+        self.name = name
+        self.loader = loader
+        self.interval = interval
+        self.value = None
+        self.updated = None
+        self.body = None
+        self.etag = None
+        self._lock = threading.Lock()
+        self._refresher_pid = None
+
+    @property
+    def path(self):
+        return os.path.join(settings.MATERIALIZED_DIR, self.name + ".json")
+
+    def get(self):
+        if self.value is None:
+            with self._lock:
+                if self.value is None and not self._load():
+                    self.refresh()
+        self._start_refresher()
+        return self.value
+
+    def get_body(self):
+        """
+        :return: (json encoded value, etag)
+        """
+        self.get()
+        return self.body, self.etag
+
+    def refresh(self):
+        """
+        Recompute the value now, and save it
+        """
+        value = self.loader()
+        self._set(value, time.time())
+        try:
+            self._save()
+        except OSError:
+            logger.exception("saving %s failed", self.path)
+
+    def _set(self, value, updated):
+        body = json.dumps(value).encode('utf-8')
+        self.body, self.etag, self.value, self.updated = body, hashlib.sha1(body).hexdigest(), value, updated
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self._set(saved['value'], saved['updated'])
+        return True
+
+    def _save(self):
+        private_dir(settings.MATERIALIZED_DIR)
+        tmp_path = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump({'value': self.value, 'updated': self.updated}, f)
+        os.replace(tmp_path, self.path)
+
+    def _start_refresher(self):
+        pid = os.getpid()
+        if self._refresher_pid == pid:
+            return
+        with self._lock:
+            if self._refresher_pid != pid:
+                self._refresher_pid = pid
+                threading.Thread(target=self._refresh_periodically, daemon=True).start()
+
+    def _refresh_periodically(self):
+        while True:
+            # a value loaded from the file may be due for a refresh already
+            time.sleep(max(0, (self.updated or 0) + self.interval - time.time()))
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("refreshing %s failed", self.name)
+                time.sleep(min(self.interval, 60))
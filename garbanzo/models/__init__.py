@@ -11,4 +11,6 @@ from .statement import Statement
 from .statement_object import StatementObject
 from .statement_predicate import StatementPredicate
 from .statement_subject import StatementSubject
+from .statements_query import StatementsQuery
+from .statements_result import StatementsResult
 from .summary import Summary
@@ -12,6 +12,22 @@ class Annotation(Model):
     NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually.
     """
+    __slots__ = ('_id', '_label', '_type', '_date')
+
+    swagger_types = {
+        'id': str,
+        'label': str,
+        'type': str,
+        'date': str
+    }
+
+    attribute_map = {
+        'id': 'id',
+        'label': 'label',
+        'type': 'type',
+        'date': 'date'
+    }
+
     def __init__(self, id: str=None, label: str=None, type: str=None, date: str=None):
         """
         Annotation - a model defined in Swagger
@@ -25,20 +41,6 @@ class Annotation(Model):
         :param date: The date of this Annotation.
         :type date: str
         """
-        self.swagger_types = {
-            'id': str,
-            'label': str,
-            'type': str,
-            'date': str
-        }
-
-        self.attribute_map = {
-            'id': 'id',
-            'label': 'label',
-            'type': 'type',
-            'date': 'date'
-        }
-
         self._id = id
         self._label = label
         self._type = type
@@ -7,6 +7,9 @@ T = TypeVar('T')
 
 
 class Model(object):
+    # the attributes of the models are in __slots__, their maps below are class constants
+    __slots__ = ()
+
     # swaggerTypes: The key is attribute name and the value is attribute type.
     swagger_types = {}
 
@@ -66,7 +69,9 @@ class Model(object):
         """
         Returns true if both objects are equal
         """
-        return self.__dict__ == other.__dict__
+        if not isinstance(other, self.__class__):
+            return False
+        return all(getattr(self, attr) == getattr(other, attr) for attr in self.swagger_types)
 
     def __ne__(self, other):
         """
@@ -12,6 +12,24 @@ class Concept(Model):
     NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually.
     """
+    __slots__ = ('_id', '_name', '_semantic_group', '_synonyms', '_definition')
+
+    swagger_types = {
+        'id': str,
+        'name': str,
+        'semantic_group': str,
+        'synonyms': List[str],
+        'definition': str
+    }
+
+    attribute_map = {
+        'id': 'id',
+        'name': 'name',
+        'semantic_group': 'semanticGroup',
+        'synonyms': 'synonyms',
+        'definition': 'definition'
+    }
+
     def __init__(self, id: str=None, name: str=None, semantic_group: str=None, synonyms: List[str]=None, definition: str=None):
         """
         Concept - a model defined in Swagger
@@ -27,22 +45,6 @@ class Concept(Model):
         :param definition: The definition of this Concept.
         :type definition: str
         """
-        self.swagger_types = {
-            'id': str,
-            'name': str,
-            'semantic_group': str,
-            'synonyms': List[str],
-            'definition': str
-        }
-
-        self.attribute_map = {
-            'id': 'id',
-            'name': 'name',
-            'semantic_group': 'semanticGroup',
-            'synonyms': 'synonyms',
-            'definition': 'definition'
-        }
-
         self._id = id
         self._name = name
         self._semantic_group = semantic_group
@@ -12,6 +12,18 @@ class ConceptDetail(Model):
     NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually.
     """
+    __slots__ = ('_tag', '_value')
+
+    swagger_types = {
+        'tag': str,
+        'value': str
+    }
+
+    attribute_map = {
+        'tag': 'tag',
+        'value': 'value'
+    }
+
     def __init__(self, tag: str=None, value: str=None):
         """
         ConceptDetail - a model defined in Swagger
@@ -21,16 +33,6 @@ class ConceptDetail(Model):
         :param value: The value of this ConceptDetail.
         :type value: str
         """
-        self.swagger_types = {
-            'tag': str,
-            'value': str
-        }
-
-        self.attribute_map = {
-            'tag': 'tag',
-            'value': 'value'
-        }
-
         self._tag = tag
         self._value = value
 
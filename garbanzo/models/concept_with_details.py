@@ -13,6 +13,26 @@ class ConceptWithDetails(Model):
     NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually.
     """
+    __slots__ = ('_id', '_name', '_semantic_group', '_synonyms', '_definition', '_details')
+
+    swagger_types = {
+        'id': str,
+        'name': str,
+        'semantic_group': str,
+        'synonyms': List[str],
+        'definition': str,
+        'details': List[ConceptDetail]
+    }
+
+    attribute_map = {
+        'id': 'id',
+        'name': 'name',
+        'semantic_group': 'semanticGroup',
+        'synonyms': 'synonyms',
+        'definition': 'definition',
+        'details': 'details'
+    }
+
     def __init__(self, id: str=None, name: str=None, semantic_group: str=None, synonyms: List[str]=None, definition: str=None, details: List[ConceptDetail]=None):
         """
         ConceptWithDetails - a model defined in Swagger
@@ -30,24 +50,6 @@ class ConceptWithDetails(Model):
         :param details: The details of this ConceptWithDetails.
         :type details: List[ConceptDetail]
         """
-        self.swagger_types = {
-            'id': str,
-            'name': str,
-            'semantic_group': str,
-            'synonyms': List[str],
-            'definition': str,
-            'details': List[ConceptDetail]
-        }
-
-        self.attribute_map = {
-            'id': 'id',
-            'name': 'name',
-            'semantic_group': 'semanticGroup',
-            'synonyms': 'synonyms',
-            'definition': 'definition',
-            'details': 'details'
-        }
-
         self._id = id
         self._name = name
         self._semantic_group = semantic_group
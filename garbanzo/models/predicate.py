@@ -12,6 +12,20 @@ class Predicate(Model):
     NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually.
     """
+    __slots__ = ('_id', '_name', '_definition')
+
+    swagger_types = {
+        'id': str,
+        'name': str,
+        'definition': str
+    }
+
+    attribute_map = {
+        'id': 'id',
+        'name': 'name',
+        'definition': 'definition'
+    }
+
     def __init__(self, id: str=None, name: str=None, definition: str=None):
         """
         Predicate - a model defined in Swagger
@@ -23,18 +37,6 @@ class Predicate(Model):
         :param definition: The definition of this Predicate.
         :type definition: str
         """
-        self.swagger_types = {
-            'id': str,
-            'name': str,
-            'definition': str
-        }
-
-        self.attribute_map = {
-            'id': 'id',
-            'name': 'name',
-            'definition': 'definition'
-        }
-
         self._id = id
         self._name = name
         self._definition = definition
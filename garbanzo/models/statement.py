@@ -15,6 +15,22 @@ class Statement(Model):
     NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually.
     """
+    __slots__ = ('_id', '_subject', '_predicate', '_object')
+
+    swagger_types = {
+        'id': str,
+        'subject': StatementSubject,
+        'predicate': StatementPredicate,
+        'object': StatementObject
+    }
+
+    attribute_map = {
+        'id': 'id',
+        'subject': 'subject',
+        'predicate': 'predicate',
+        'object': 'object'
+    }
+
     def __init__(self, id: str=None, subject: StatementSubject=None, predicate: StatementPredicate=None, object: StatementObject=None):
         """
         Statement - a model defined in Swagger
@@ -28,20 +44,6 @@ class Statement(Model):
         :param object: The object of this Statement.
         :type object: StatementObject
         """
-        self.swagger_types = {
-            'id': str,
-            'subject': StatementSubject,
-            'predicate': StatementPredicate,
-            'object': StatementObject
-        }
-
-        self.attribute_map = {
-            'id': 'id',
-            'subject': 'subject',
-            'predicate': 'predicate',
-            'object': 'object'
-        }
-
         self._id = id
         self._subject = subject
         self._predicate = predicate
@@ -12,6 +12,20 @@ class StatementObject(Model):
     NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually.
     """
+    __slots__ = ('_id', '_name', '_semantic_group')
+
+    swagger_types = {
+        'id': str,
+        'name': str,
+        'semantic_group': str
+    }
+
+    attribute_map = {
+        'id': 'id',
+        'name': 'name',
+        'semantic_group': 'semanticGroup'
+    }
+
     def __init__(self, id: str=None, name: str=None, semantic_group: str=None):
         """
         StatementObject - a model defined in Swagger
@@ -23,18 +37,6 @@ class StatementObject(Model):
         :param semantic_group: The semantic_group of this StatementObject.
         :type semantic_group: str
         """
-        self.swagger_types = {
-            'id': str,
-            'name': str,
-            'semantic_group': str
-        }
-
-        self.attribute_map = {
-            'id': 'id',
-            'name': 'name',
-            'semantic_group': 'semanticGroup'
-        }
-
         self._id = id
         self._name = name
         self._semantic_group = semantic_group
@@ -12,6 +12,18 @@ class StatementPredicate(Model):
     NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually.
     """
+    __slots__ = ('_id', '_name')
+
+    swagger_types = {
+        'id': str,
+        'name': str
+    }
+
+    attribute_map = {
+        'id': 'id',
+        'name': 'name'
+    }
+
     def __init__(self, id: str=None, name: str=None):
         """
         StatementPredicate - a model defined in Swagger
@@ -21,16 +33,6 @@ class StatementPredicate(Model):
         :param name: The name of this StatementPredicate.
         :type name: str
         """
-        self.swagger_types = {
-            'id': str,
-            'name': str
-        }
-
-        self.attribute_map = {
-            'id': 'id',
-            'name': 'name'
-        }
-
         self._id = id
         self._name = name
 
@@ -0,0 +1,238 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+from .base_model_ import Model
+from datetime import date, datetime
+from typing import List, Dict
+from ..util import deserialize_model
+
+
+class StatementsQuery(Model):
+    """
+    NOTE: This class is auto generated by the swagger code generator program.
+    Do not edit the class manually.
+    """
+    __slots__ = ('_s', '_relations', '_t', '_keywords', '_semantic_groups', '_page_number', '_page_size')
+
+    swagger_types = {
+        's': List[str],
+        'relations': str,
+        't': List[str],
+        'keywords': str,
+        'semantic_groups': str,
+        'page_number': int,
+        'page_size': int
+    }
+
+    attribute_map = {
+        's': 's',
+        'relations': 'relations',
+        't': 't',
+        'keywords': 'keywords',
+        'semantic_groups': 'semanticGroups',
+        'page_number': 'pageNumber',
+        'page_size': 'pageSize'
+    }
+
+    def __init__(self, s: List[str]=None, relations: str=None, t: List[str]=None, keywords: str=None, semantic_groups: str=None, page_number: int=None, page_size: int=None):
+        """
+        StatementsQuery - a model defined in Swagger
+
+        :param s: The s of this StatementsQuery.
+        :type s: List[str]
+        :param relations: The relations of this StatementsQuery.
+        :type relations: str
+        :param t: The t of this StatementsQuery.
+        :type t: List[str]
+        :param keywords: The keywords of this StatementsQuery.
+        :type keywords: str
+        :param semantic_groups: The semantic_groups of this StatementsQuery.
+        :type semantic_groups: str
+        :param page_number: The page_number of this StatementsQuery.
+        :type page_number: int
+        :param page_size: The page_size of this StatementsQuery.
+        :type page_size: int
+        """
+        self._s = s
+        self._relations = relations
+        self._t = t
+        self._keywords = keywords
+        self._semantic_groups = semantic_groups
+        self._page_number = page_number
+        self._page_size = page_size
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'StatementsQuery':
+        """
+        Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The StatementsQuery of this StatementsQuery.
+        :rtype: StatementsQuery
+        """
+        return deserialize_model(dikt, cls)
+
+    @property
+    def s(self) -> List[str]:
+        """
+        Gets the s of this StatementsQuery.
+        a set of [CURIE-encoded](https://www.w3.org/TR/curie/) identifiers of 'source' concepts, as the s parameter of /statements
+
+        :return: The s of this StatementsQuery.
+        :rtype: List[str]
+        """
+        return self._s
+
+    @s.setter
+    def s(self, s: List[str]):
+        """
+        Sets the s of this StatementsQuery.
+        a set of [CURIE-encoded](https://www.w3.org/TR/curie/) identifiers of 'source' concepts, as the s parameter of /statements
+
+        :param s: The s of this StatementsQuery.
+        :type s: List[str]
+        """
+        if s is None:
+            raise ValueError("Invalid value for `s`, must not be `None`")
+
+        self._s = s
+
+    @property
+    def relations(self) -> str:
+        """
+        Gets the relations of this StatementsQuery.
+        a space-delimited string of predicate relation identifiers, as the relations parameter of /statements
+
+        :return: The relations of this StatementsQuery.
+        :rtype: str
+        """
+        return self._relations
+
+    @relations.setter
+    def relations(self, relations: str):
+        """
+        Sets the relations of this StatementsQuery.
+        a space-delimited string of predicate relation identifiers, as the relations parameter of /statements
+
+        :param relations: The relations of this StatementsQuery.
+        :type relations: str
+        """
+
+        self._relations = relations
+
+    @property
+    def t(self) -> List[str]:
+        """
+        Gets the t of this StatementsQuery.
+        a set of [CURIE-encoded](https://www.w3.org/TR/curie/) identifiers of 'target' concepts, as the t parameter of /statements
+
+        :return: The t of this StatementsQuery.
+        :rtype: List[str]
+        """
+        return self._t
+
+    @t.setter
+    def t(self, t: List[str]):
+        """
+        Sets the t of this StatementsQuery.
+        a set of [CURIE-encoded](https://www.w3.org/TR/curie/) identifiers of 'target' concepts, as the t parameter of /statements
+
+        :param t: The t of this StatementsQuery.
+        :type t: List[str]
+        """
+
+        self._t = t
+
+    @property
+    def keywords(self) -> str:
+        """
+        Gets the keywords of this StatementsQuery.
+        a space-delimited string of keywords, as the keywords parameter of /statements
+
+        :return: The keywords of this StatementsQuery.
+        :rtype: str
+        """
+        return self._keywords
+
+    @keywords.setter
+    def keywords(self, keywords: str):
+        """
+        Sets the keywords of this StatementsQuery.
+        a space-delimited string of keywords, as the keywords parameter of /statements
+
+        :param keywords: The keywords of this StatementsQuery.
+        :type keywords: str
+        """
+
+        self._keywords = keywords
+
+    @property
+    def semantic_groups(self) -> str:
+        """
+        Gets the semantic_groups of this StatementsQuery.
+        a space-delimited string of semantic groups, as the semanticGroups parameter of /statements
+
+        :return: The semantic_groups of this StatementsQuery.
+        :rtype: str
+        """
+        return self._semantic_groups
+
+    @semantic_groups.setter
+    def semantic_groups(self, semantic_groups: str):
+        """
+        Sets the semantic_groups of this StatementsQuery.
+        a space-delimited string of semantic groups, as the semanticGroups parameter of /statements
+
+        :param semantic_groups: The semantic_groups of this StatementsQuery.
+        :type semantic_groups: str
+        """
+
+        self._semantic_groups = semantic_groups
+
+    @property
+    def page_number(self) -> int:
+        """
+        Gets the page_number of this StatementsQuery.
+        (1-based) number of the page to be returned
+
+        :return: The page_number of this StatementsQuery.
+        :rtype: int
+        """
+        return self._page_number
+
+    @page_number.setter
+    def page_number(self, page_number: int):
+        """
+        Sets the page_number of this StatementsQuery.
+        (1-based) number of the page to be returned
+
+        :param page_number: The page_number of this StatementsQuery.
+        :type page_number: int
+        """
+
+        self._page_number = page_number
+
+    @property
+    def page_size(self) -> int:
+        """
+        Gets the page_size of this StatementsQuery.
+        number of statements per page to be returned
+
+        :return: The page_size of this StatementsQuery.
+        :rtype: int
+        """
+        return self._page_size
+
+    @page_size.setter
+    def page_size(self, page_size: int):
+        """
+        Sets the page_size of this StatementsQuery.
+        number of statements per page to be returned
+
+        :param page_size: The page_size of this StatementsQuery.
+        :type page_size: int
+        """
+
+        self._page_size = page_size
+
@@ -0,0 +1,69 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+from garbanzo.models.statement import Statement
+from .base_model_ import Model
+from datetime import date, datetime
+from typing import List, Dict
+from ..util import deserialize_model
+
+
+class StatementsResult(Model):
+    """
+    NOTE: This class is auto generated by the swagger code generator program.
+    Do not edit the class manually.
+    """
+    __slots__ = ('_statements',)
+
+    swagger_types = {
+        'statements': List[Statement]
+    }
+
+    attribute_map = {
+        'statements': 'statements'
+    }
+
+    def __init__(self, statements: List[Statement]=None):
+        """
+        StatementsResult - a model defined in Swagger
+
+        :param statements: The statements of this StatementsResult.
+        :type statements: List[Statement]
+        """
+        self._statements = statements
+
+    @classmethod
+    def from_dict(cls, dikt) -> 'StatementsResult':
+        """
+        Returns the dict as a model
+
+        :param dikt: A dict.
+        :type: dict
+        :return: The StatementsResult of this StatementsResult.
+        :rtype: StatementsResult
+        """
+        return deserialize_model(dikt, cls)
+
+    @property
+    def statements(self) -> List[Statement]:
+        """
+        Gets the statements of this StatementsResult.
+        the page of statements of the query
+
+        :return: The statements of this StatementsResult.
+        :rtype: List[Statement]
+        """
+        return self._statements
+
+    @statements.setter
+    def statements(self, statements: List[Statement]):
+        """
+        Sets the statements of this StatementsResult.
+        the page of statements of the query
+
+        :param statements: The statements of this StatementsResult.
+        :type statements: List[Statement]
+        """
+
+        self._statements = statements
+
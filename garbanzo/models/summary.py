@@ -12,6 +12,20 @@ class Summary(Model):
     NOTE: This class is auto generated by the swagger code generator program.
     Do not edit the class manually.
     """
+    __slots__ = ('_id', '_idmap', '_frequency')
+
+    swagger_types = {
+        'id': str,
+        'idmap': str,
+        'frequency': int
+    }
+
+    attribute_map = {
+        'id': 'id',
+        'idmap': 'idmap',
+        'frequency': 'frequency'
+    }
+
     def __init__(self, id: str=None, idmap: str=None, frequency: int=None):
         """
         Summary - a model defined in Swagger
@@ -23,18 +37,6 @@ class Summary(Model):
         :param frequency: The frequency of this Summary.
         :type frequency: int
         """
-        self.swagger_types = {
-            'id': str,
-            'idmap': str,
-            'frequency': int
-        }
-
-        self.attribute_map = {
-            'id': 'id',
-            'idmap': 'idmap',
-            'frequency': 'frequency'
-        }
-
         self._id = id
         self._idmap = idmap
         self._frequency = frequency
@@ -0,0 +1,93 @@
+"""
+A fast path to serialize responses: the dicts of garbanzo.lookup are turned straight into json bytes, without
+building the generated models (e.g. Statement(**x)) for encoder.JSONEncoder to walk attribute by attribute.
+
+The key map of each model, i.e. its json keys and the models of its values, is computed once from its swagger_types
+and attribute_map, and used to keep only the keys of the model (and skip the nulls, as the encoder does).
+
+ujson (a requirement) is used when installed, else the json module.
+"""
+import json
+import typing
+
+from flask import Response
+
+from garbanzo.models.base_model_ import Model
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+_key_maps = {}
+_projectors = {}
+
+
+def dumps(value):
+    """
+    :return: value as utf-8 json bytes
+    """
+    if ujson is not None:
+        return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _model(type_):
+    # (model, is a list of it) if type_ is a model or a List of models, else (None, False)
+    if isinstance(type_, type) and issubclass(type_, Model):
+        return type_, False
+    args = getattr(type_, '__args__', None)
+    if getattr(type_, '__origin__', None) in (list, typing.List) and args:
+        return _model(args[0])[0], True
+    return None, False
+
+
+def key_map(model):
+    """
+    :param model: a generated model class, e.g. Statement
+    :return: [(json key, model of the value or None, whether the value is a list of it)]
+    """
+    if model not in _key_maps:
+        _key_maps[model] = [(model.attribute_map[attr],) + _model(type_) for attr, type_ in model.swagger_types.items()]
+    return _key_maps[model]
+
+
+def project(value, model):
+    """
+    :param value: a dict with the json keys of model, e.g. a statement of lookup.query_statements
+    :return: the dict of its model keys that aren't null, as the JSONEncoder would output for model(**value)
+    """
+    return projector(model)(value)
+
+
+def projector(model):
+    """
+    :return: the function projecting the dicts of model (see project), built once from its key map
+    """
+    if model not in _projectors:
+        fields = [(key, projector(value_model) if value_model is not None else None, many)
+                  for key, value_model, many in key_map(model)]
+
+        def convert(x, sub, many):
+            if sub is None:
+                return x
+            if many:
+                return [sub(y) if isinstance(y, dict) else y for y in x]
+            return sub(x) if isinstance(x, dict) else x
+
+        if all(sub is None for _, sub, _ in fields):
+            keys = [key for key, _, _ in fields]
+            _projectors[model] = lambda value: {key: value[key] for key in keys if value.get(key) is not None}
+        else:
+            _projectors[model] = lambda value: {key: convert(value[key], sub, many) for key, sub, many in fields
+                                                if value.get(key) is not None}
+    return _projectors[model]
+
+
+def json_response(values, model, status=200, headers=None):
+    """
+    :param values: list of dicts with the json keys of model
+    :return: a flask Response of the json list of values as model
+    """
+    body = dumps([project(x, model) for x in values])
+    return Response(body, status=status, headers=headers, mimetype="application/json")
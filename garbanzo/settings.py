@@ -0,0 +1,85 @@
+"""
+Runtime configuration for garbanzo.
+
+Every setting can be overridden from the environment with a ``GARBANZO_`` prefixed variable of the same name,
+e.g. ``GARBANZO_HTTP_POOL_MAXSIZE=20``.
+"""
+import os
+
+
+def _get(name, default, cast=str):
+    value = os.environ.get("GARBANZO_" + name)
+    if value is None:
+        return default
+    if cast is bool:
+        return value.strip().lower() in {'1', 'true', 'yes', 'on'}
+    return cast(value)
+
+
+# Upstream HTTP client (see garbanzo.upstream)
+HTTP_POOL_CONNECTIONS = _get("HTTP_POOL_CONNECTIONS", 4, int)  # number of hosts to keep a connection pool for
+HTTP_POOL_MAXSIZE = _get("HTTP_POOL_MAXSIZE", 10, int)  # connections kept open per host
+HTTP_POOL_BLOCK = _get("HTTP_POOL_BLOCK", True, bool)  # wait for a free connection instead of exceeding the limit
+HTTP_KEEP_ALIVE = _get("HTTP_KEEP_ALIVE", True, bool)
+HTTP_GZIP = _get("HTTP_GZIP", True, bool)
+HTTP_TIMEOUT = _get("HTTP_TIMEOUT", 65, float)  # seconds; the public SPARQL endpoint gives up after 60
+USER_AGENT = _get("USER_AGENT", "garbanzo: github.com/SuLab/garbanzo")
+ASYNC_MAX_WORKERS = _get("ASYNC_MAX_WORKERS", HTTP_POOL_MAXSIZE, int)  # upstream calls in flight per process
+
+# Lookups (see garbanzo.lookup)
+ENTITY_FETCH_CONCURRENCY = _get("ENTITY_FETCH_CONCURRENCY", 4, int)  # wbgetentities chunks fetched at once
+# subclass closure of the semantic group types, built by `python -m garbanzo.closure` (see garbanzo.closure)
+SEMGROUP_CLOSURE_PATH = _get("SEMGROUP_CLOSURE_PATH", "")
+# local statement store filled by `python -m garbanzo.ingest`, read instead of the SPARQL endpoint (see garbanzo.store)
+STATEMENT_STORE_PATH = _get("STATEMENT_STORE_PATH", "")
+# its adjacency, memory mapped, built by `python -m garbanzo.graph` (see garbanzo.graph)
+STATEMENT_GRAPH_PATH = _get("STATEMENT_GRAPH_PATH", "")
+# query the statements of both directions at once, instead of one query per direction
+STATEMENTS_SINGLE_QUERY = _get("STATEMENTS_SINGLE_QUERY", True, bool)
+# s, t and relations values per statements query, adapted to keep queries under STATEMENTS_BATCH_TARGET_SEC seconds
+# (see garbanzo.batching)
+STATEMENTS_BATCH_SIZE = _get("STATEMENTS_BATCH_SIZE", 100, int)  # to start with
+STATEMENTS_BATCH_MIN = _get("STATEMENTS_BATCH_MIN", 5, int)
+STATEMENTS_BATCH_MAX = _get("STATEMENTS_BATCH_MAX", 500, int)
+STATEMENTS_BATCH_TARGET_SEC = _get("STATEMENTS_BATCH_TARGET_SEC", 10, float)
+STATEMENTS_BATCH_CONCURRENCY = _get("STATEMENTS_BATCH_CONCURRENCY", 4, int)  # batches queried at once
+# concept searches filtered by semantic group: wbsearchentities batches fetched at most to fill a page, and whether
+# the next page is prefetched
+SEARCH_MAX_BATCHES = _get("SEARCH_MAX_BATCHES", 10, int)
+SEARCH_PREFETCH = _get("SEARCH_PREFETCH", True, bool)
+SEARCH_PREFETCH_WORKERS = _get("SEARCH_PREFETCH_WORKERS", 2, int)  # prefetches run at once per process, others dropped
+
+# Files the workers of a host share, in a directory only the user running garbanzo can write to (see
+# garbanzo.cache.private_dir): never in a world-writable one such as /tmp, as the caches are loaded from them
+DATA_DIR = _get("DATA_DIR", os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                                         "garbanzo"))
+
+# Materialized values (see garbanzo.materialized)
+MATERIALIZED_DIR = _get("MATERIALIZED_DIR", os.path.join(DATA_DIR, "materialized"))
+TYPES_REFRESH_SEC = _get("TYPES_REFRESH_SEC", 3600, float)  # /types counts
+PREDICATES_REFRESH_SEC = _get("PREDICATES_REFRESH_SEC", 86400, float)  # /predicates catalog
+
+# Lookup caches (see garbanzo.cache)
+CACHE_BACKEND = _get("CACHE_BACKEND", "memory")  # "memory" (per process) or "sqlite" (shared by the processes)
+CACHE_PATH = _get("CACHE_PATH", os.path.join(DATA_DIR, "cache.sqlite"))
+# key the sqlite cache items and the snapshots are signed with (HMAC), so that only garbanzo's own are ever unpickled.
+# Defaults to a random key generated in CACHE_SECRET_PATH
+CACHE_SECRET = _get("CACHE_SECRET", "")
+CACHE_SECRET_PATH = _get("CACHE_SECRET_PATH", os.path.join(DATA_DIR, "secret"))
+CACHE_STALE_WHILE_REVALIDATE_SEC = _get("CACHE_STALE_WHILE_REVALIDATE_SEC", 60, float)  # serve while refreshing
+CACHE_STALE_IF_ERROR_SEC = _get("CACHE_STALE_IF_ERROR_SEC", 3600, float)  # serve when wikidata fails
+CACHE_REFRESH_WORKERS = _get("CACHE_REFRESH_WORKERS", 2, int)  # background refreshes run at once per process
+# sqlite: a process loading an item claims it for that long at most, the others wait for it, polling the cache
+CACHE_LEASE_SEC = _get("CACHE_LEASE_SEC", 70, float)  # longer than HTTP_TIMEOUT
+CACHE_LEASE_POLL_SEC = _get("CACHE_LEASE_POLL_SEC", 0.05, float)
+CACHE_STATS_LOG_INTERVAL_SEC = _get("CACHE_STATS_LOG_INTERVAL_SEC", 300, float)  # 0: never log the cache counters
+CACHE_SNAPSHOT_PATH = _get("CACHE_SNAPSHOT_PATH", "")  # file the in-memory caches are saved to and loaded from
+CACHE_SNAPSHOT_INTERVAL_SEC = _get("CACHE_SNAPSHOT_INTERVAL_SEC", 300, float)  # 0: only save on shutdown
+
+# Cursor pagination (see garbanzo.cursors). The result snapshots use the CACHE_BACKEND
+CURSOR_TTL_SEC = _get("CURSOR_TTL_SEC", 1800, float)  # time a client has to page through a result
+CURSOR_MAX_CHUNKS = _get("CURSOR_MAX_CHUNKS", 10000, int)  # snapshot chunks (of cursors.CHUNK_SIZE items) kept
+
+# Response validation against the swagger spec (see garbanzo.validation): "always", "sampled" or "off"
+RESPONSE_VALIDATION = _get("RESPONSE_VALIDATION", "always")
+RESPONSE_VALIDATION_SAMPLE = _get("RESPONSE_VALIDATION_SAMPLE", 100, int)  # sampled: validate 1 in N responses
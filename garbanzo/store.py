@@ -0,0 +1,184 @@
+"""
+A local statement store, so that /statements can be served without the public SPARQL endpoint.
+
+It is a sqlite database, filled from a Wikidata dump by garbanzo.ingest, with:
+ - statements (id, s, r, t): the item valued statements, indexed by subject and by object
+ - labels (entity, label): english labels
+ - types (entity, type): the (truthy) P31 values of the items
+
+When settings.STATEMENT_STORE_PATH is set, lookup.query_statements reads from it, and returns the same statements
+the SPARQL query would (see StatementStore.query_statements). With settings.STATEMENT_GRAPH_PATH too, the statements
+are found in its graph file (see garbanzo.graph), the store giving their labels and types.
+"""
+import os
+import sqlite3
+import threading
+from itertools import chain
+
+from garbanzo import graph, settings
+from garbanzo.utils import always_qid, get_semgroups_from_qids
+
+MAX_VARIABLES = 500  # per "IN (...)": old sqlites accept 999 variables per statement at most
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (id TEXT PRIMARY KEY, s TEXT NOT NULL, r TEXT NOT NULL, t TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS labels (entity TEXT PRIMARY KEY, label TEXT NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS types (entity TEXT NOT NULL, type TEXT NOT NULL, PRIMARY KEY (entity, type)) WITHOUT ROWID;
+"""
+INDEXES = """
+CREATE INDEX IF NOT EXISTS statements_s ON statements (s, r);
+CREATE INDEX IF NOT EXISTS statements_t ON statements (t, r);
+"""
+
+
+def _chunks(values, size=MAX_VARIABLES):
+    values = sorted(values)
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+class StatementStore:
+    """
+    :param graph: a graph.Graph of the statements, to find them in rather than in the statements table
+    """
+
+    def __init__(self, path, graph=None):
+        self.path = path
+        self.graph = graph
+        self._local = threading.local()
+
+    @property
+    def db(self):
+        # one connection per thread (and per process: a forked worker must not use its parent's)
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path)
+            db.executescript(SCHEMA)
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def create_indexes(self):
+        self.db.executescript(INDEXES)
+
+    def add_statements(self, statements):
+        """
+        :param statements: iterable of (id, s, r, t), e.g. ("wds:Q42$F078E5B3-...", "Q42", "P31", "Q5")
+        """
+        self.db.executemany("INSERT OR REPLACE INTO statements VALUES (?, ?, ?, ?)", statements)
+
+    def add_labels(self, labels):
+        """
+        :param labels: iterable of (entity, label)
+        """
+        self.db.executemany("INSERT OR REPLACE INTO labels VALUES (?, ?)", labels)
+
+    def add_types(self, types):
+        """
+        :param types: iterable of (entity, type)
+        """
+        self.db.executemany("INSERT OR IGNORE INTO types VALUES (?, ?)", types)
+
+    def commit(self):
+        self.db.commit()
+
+    def prune(self):
+        """
+        Remove the labels and types of the entities that are in no statement
+        """
+        self.db.execute("DELETE FROM labels WHERE entity NOT IN "
+                        "(SELECT s FROM statements UNION SELECT r FROM statements UNION SELECT t FROM statements)")
+        self.db.execute("DELETE FROM types WHERE entity NOT IN (SELECT s FROM statements UNION SELECT t FROM statements)")
+        self.db.commit()
+
+    def _select(self, query, values, *args):
+        rows = []
+        for chunk in _chunks(values):
+            rows.extend(self.db.execute(query.format(",".join("?" * len(chunk))), list(chunk) + list(args)))
+        return rows
+
+    def _match(self, s, t, relations):
+        # the statements with s as subject, t (if any) as object and one of the relations (if any)
+        query = "SELECT id, s, r, t FROM statements WHERE s IN ({})"
+        rows = self._select(query, s)
+        if t:
+            rows = [row for row in rows if row[3] in t]
+        if relations:
+            rows = [row for row in rows if row[2] in relations]
+        return rows
+
+    def _reverse_match(self, s, t, relations):
+        query = "SELECT id, s, r, t FROM statements WHERE t IN ({})"
+        rows = self._select(query, s)
+        if t:
+            rows = [row for row in rows if row[1] in t]
+        if relations:
+            rows = [row for row in rows if row[2] in relations]
+        return rows
+
+    def match(self, s, t=None, relations=None):
+        """
+        :param s, t, relations: sets of ids, without prefix
+        :return: list of (id, s, r, t) of the statements matching them in either direction, sorted by id
+        """
+        if self.graph is not None:
+            return self.graph.match(s, t, relations)
+        rows = {row[0]: row for row in chain(self._match(s, t, relations), self._reverse_match(s, t, relations))}
+        return [rows[x] for x in sorted(rows)]
+
+    def iter_statements(self):
+        """
+        :return: iterator of all the (id, s, r, t), sorted by id
+        """
+        return self.db.execute("SELECT id, s, r, t FROM statements ORDER BY id")
+
+    def labels(self, entities):
+        return dict(self._select("SELECT entity, label FROM labels WHERE entity IN ({})", entities))
+
+    def types(self, entities):
+        types = {}
+        for entity, type_ in self._select("SELECT entity, type FROM types WHERE entity IN ({})", entities):
+            types.setdefault(entity, []).append(type_)
+        return types
+
+    def query_statements(self, s, t=None, relations=None):
+        """
+        Same as lookup.query_statements: the statements between items with a subject in s and an object in t (if
+        given), or the other way round, and a predicate in relations (if given), sorted by id
+        """
+        s = set(map(always_qid, s))
+        t = set(map(always_qid, t)) if t else set()
+        relations = set(map(always_qid, relations)) if relations else set()
+
+        rows = self.match(s, t, relations)
+        entities = set(chain(*[row[1:] for row in rows]))
+        labels = self.labels(entities)
+        types = self.types(set(chain(*[(row[1], row[3]) for row in rows])))
+
+        def semantic_group(entity):
+            # as the query, which groups the types of an entity into a string: "" when it has none
+            return " ".join(get_semgroups_from_qids(types[entity])) if entity in types else ""
+
+        # the label service names the entities without an english label by their id
+        return [{'id': id_,
+                 'subject': {'id': "wd:" + s_, 'name': labels.get(s_, s_), 'semanticGroup': semantic_group(s_)},
+                 'predicate': {'id': "wd:" + r, 'name': labels.get(r, r)},
+                 'object': {'id': "wd:" + t_, 'name': labels.get(t_, t_), 'semanticGroup': semantic_group(t_)},
+                 } for id_, s_, r, t_ in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    :return: the StatementStore at settings.STATEMENT_STORE_PATH (with the graph at settings.STATEMENT_GRAPH_PATH, if
+    any), or None if there is none
+    """
+    global _store
+    if not settings.STATEMENT_STORE_PATH:
+        return None
+    with _store_lock:
+        if _store is None:
+            statement_graph = graph.Graph(settings.STATEMENT_GRAPH_PATH) if settings.STATEMENT_GRAPH_PATH else None
+            _store = StatementStore(settings.STATEMENT_STORE_PATH, statement_graph)
+        return _store
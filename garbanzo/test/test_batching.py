@@ -0,0 +1,88 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import unittest
+
+from requests import ConnectionError, HTTPError, Response
+
+from garbanzo import upstream
+from garbanzo.batching import AdaptiveBatchSize, arun_batches, batches
+
+
+def error_response(status, body=""):
+    response = Response()
+    response.status_code = status
+    response._content = body.encode('utf-8')
+    return response
+
+
+class TestBatching(unittest.TestCase):
+
+    def test_batches_cover_all_combinations(self):
+        self.assertEqual(batches(2, {'a', 'b', 'c'}, None, ['x']),
+                         [(('a', 'b'), None, ('x',)), (('c',), None, ('x',))])
+        self.assertEqual(len(batches(2, range(5), range(3), None)), 3 * 2)
+
+    def test_batch_size_adapts_to_latency(self):
+        size = AdaptiveBatchSize(100, 10, 120, target=1, step=10)
+        size.observe(0.5, 50)  # not a full batch: tells nothing about bigger ones
+        self.assertEqual(size.get(), 100)
+        size.observe(0.5, 100)
+        size.observe(0.5, 110)
+        size.observe(0.5, 120)
+        self.assertEqual(size.get(), 120)
+        size.observe(2, 120)
+        self.assertEqual(size.get(), 60)
+        size.failed(60)
+        size.failed(30)
+        self.assertEqual(size.get(), 15)
+        size.failed(15)
+        self.assertEqual(size.get(), 10)
+
+    def test_failed_batches_are_split(self):
+        calls = []
+
+        async def query(s, t):
+            calls.append(s)
+            if len(s) > 2:
+                raise HTTPError("query timeout",
+                                response=error_response(500, "java.util.concurrent.TimeoutException"))
+            return list(s)
+
+        size = AdaptiveBatchSize(8, 1, 8, target=10)
+        results = upstream.run(arun_batches(query, batches(size.get(), range(8), None), size, 2))
+        self.assertEqual(sorted(x for result in results for x in result), list(range(8)))
+        self.assertEqual(max(len(result) for result in results), 2)
+        self.assertLess(size.get(), 8)
+        self.assertEqual(calls[0], tuple(range(8)))
+
+    def test_unreachable_upstream_fails_fast(self):
+        calls = []
+
+        async def query(s, t):
+            calls.append(s)
+            raise ConnectionError("name resolution failed")
+
+        size = AdaptiveBatchSize(8, 1, 8, target=10)
+        with self.assertRaises(ConnectionError):
+            upstream.run(arun_batches(query, batches(size.get(), range(8), None), size, 2))
+        self.assertEqual(calls, [tuple(range(8))])
+        self.assertEqual(size.get(), 8)
+
+    def test_unavailable_upstream_fails_fast(self):
+        calls = []
+
+        async def query(s, t):
+            calls.append(s)
+            raise HTTPError("service unavailable", response=error_response(503))
+
+        size = AdaptiveBatchSize(8, 1, 8, target=10)
+        with self.assertRaises(HTTPError):
+            upstream.run(arun_batches(query, batches(size.get(), range(8), None), size, 2))
+        self.assertEqual(calls, [tuple(range(8))])
+        self.assertEqual(size.get(), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
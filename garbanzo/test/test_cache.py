@@ -0,0 +1,245 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import os
+import pickle
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+
+from cachetools import TTLCache
+
+from garbanzo.cache import cached, cached_items, private_dir, SingleFlight, SQLiteCache, save_snapshot, \
+    load_snapshot
+
+
+class TestCached(unittest.TestCase):
+
+    def test_single_flight_coalesces_concurrent_calls(self):
+        calls = []
+
+        def slow(x):
+            calls.append(x)
+            time.sleep(0.2)
+            return x * 2
+
+        flight = SingleFlight()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('k', slow, 21))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [42] * 5)
+        self.assertEqual(calls, [21])
+        self.assertEqual(flight.stats, {'calls': 1, 'coalesced': 4})
+
+    def test_cached_shares_one_upstream_call(self):
+        calls = []
+
+        @cached(TTLCache(10, 60))
+        def lookup(x):
+            calls.append(x)
+            time.sleep(0.2)
+            return [x]
+
+        threads = [threading.Thread(target=lookup, args=('Q1',)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(lookup('Q1'), ['Q1'])
+
+        self.assertEqual(calls, ['Q1'])
+        stats = lookup.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 5))
+        self.assertEqual((stats['calls'], stats['coalesced']), (1, 4))
+        self.assertEqual(lookup.cache_get('Q1'), ['Q1'])
+        self.assertIsNone(lookup.cache_get('Q2'))
+        lookup.cache_set(['Q2'], 'Q2')
+        self.assertEqual(lookup('Q2'), ['Q2'])
+        self.assertEqual(calls, ['Q1'])
+
+    def test_cached_items_fetches_only_missing_ids(self):
+        calls = []
+
+        @cached_items(TTLCache(10, 60), key=lambda x: x if x.startswith("wd:") else "wd:" + x)
+        def get_labels(qids):
+            calls.append(qids)
+            return {qid: qid.upper() for qid in qids if qid != 'wd:q404'}
+
+        self.assertEqual(get_labels(('wd:q1', 'wd:q2')), {'wd:q1': 'WD:Q1', 'wd:q2': 'WD:Q2'})
+        self.assertEqual(get_labels(['q2', 'wd:q1', 'wd:q3', 'wd:q404']),
+                         {'wd:q1': 'WD:Q1', 'wd:q2': 'WD:Q2', 'wd:q3': 'WD:Q3'})
+        self.assertEqual(get_labels(('wd:q3', 'wd:q2')), {'wd:q2': 'WD:Q2', 'wd:q3': 'WD:Q3'})
+        self.assertEqual(calls, [('wd:q1', 'wd:q2'), ('wd:q3', 'wd:q404')])
+
+    def test_stale_while_revalidate_and_stale_if_error(self):
+        values = ['v1', 'v2']
+
+        @cached(TTLCache(10, 60), ttl=0.2, stale_while_revalidate=0.2, stale_if_error=1)
+        def lookup(x):
+            if not values:
+                raise IOError("wikidata is down")
+            return values.pop(0)
+
+        self.assertEqual(lookup('Q1'), 'v1')
+        time.sleep(0.25)
+        # expired: the stale value is served while it is refreshed in the background
+        self.assertEqual(lookup('Q1'), 'v1')
+        time.sleep(0.05)
+        self.assertEqual(lookup('Q1'), 'v2')
+        time.sleep(0.5)
+        # too stale to be served while refreshing, but served when the refresh fails
+        self.assertEqual(lookup('Q1'), 'v2')
+        time.sleep(1)
+        with self.assertRaises(IOError):
+            lookup('Q1')
+
+        stats = lookup.cache_stats()
+        self.assertEqual((stats['stale_served'], stats['stale_on_error']), (1, 1))
+
+
+class TestSQLiteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+
+    def test_sqlite_cache(self):
+        now = [1000.0]
+        cache = SQLiteCache('test', 2, 10, path=self.path, timer=lambda: now[0])
+        # another process sees the same items, whatever the iteration order of the frozensets in the key
+        other = SQLiteCache('test', 2, 10, path=self.path, timer=lambda: now[0])
+
+        cache[(frozenset({'wd:Q1', 'wd:Q2'}), None)] = [{'id': 'wds:Q1$A'}]
+        self.assertEqual(other[(frozenset({'wd:Q2', 'wd:Q1'}), None)], [{'id': 'wds:Q1$A'}])
+        self.assertNotIn((frozenset({'wd:Q1'}), None), other)
+        self.assertIsNone(SQLiteCache('other', 2, 10, path=self.path).get((frozenset({'wd:Q1', 'wd:Q2'}), None)))
+
+        now[0] += 11
+        self.assertNotIn((frozenset({'wd:Q1', 'wd:Q2'}), None), other)
+
+        for i in range(3):
+            cache[i] = i
+            now[0] += 1
+        cache.expire()
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn(0, cache)
+        self.assertEqual(cache[2], 2)
+
+    def test_sqlite_cache_leases(self):
+        now = [1000.0]
+        cache = SQLiteCache('test', 2, 10, path=self.path, timer=lambda: now[0])
+        other = SQLiteCache('test', 2, 10, path=self.path, timer=lambda: now[0])
+
+        self.assertTrue(cache.lease('k', 5))
+        self.assertFalse(other.lease('k', 5))
+        now[0] += 6  # the holder died
+        self.assertTrue(other.lease('k', 5))
+        other.release('k')
+        self.assertTrue(cache.lease('k', 5))
+
+    def test_misses_are_coalesced_across_processes(self):
+        calls = []
+
+        @cached(SQLiteCache('leased', 10, 60, path=self.path), ttl=60)
+        def lookup(x):
+            calls.append(x)
+            return x * 2
+
+        @cached_items(SQLiteCache('leased_items', 10, 60, path=self.path), ttl=60)
+        def labels(ids):
+            calls.append(ids)
+            return {x: x.upper() for x in ids}
+
+        # another process is loading these items
+        other = SQLiteCache('leased', 10, 60, path=self.path)
+        other_items = SQLiteCache('leased_items', 10, 60, path=self.path)
+        self.assertTrue(other.lease(lookup.cache_key(21), 60))
+        self.assertTrue(other_items.lease('b', 60))
+
+        def load(cache, k, value):
+            time.sleep(0.2)
+            cache[k] = (value, time.time() + 60)
+            cache.release(k)
+
+        for cache, k, value, call, expected in [(other, lookup.cache_key(21), 42, lambda: lookup(21), 42),
+                                                (other_items, 'b', 'B', lambda: labels(['a', 'b']),
+                                                 {'a': 'A', 'b': 'B'})]:
+            thread = threading.Thread(target=load, args=(cache, k, value))
+            thread.start()
+            self.assertEqual(call(), expected)
+            thread.join()
+        self.assertEqual(calls, [('a',)])
+        self.assertEqual(lookup.cache_stats()['coalesced_remote'], 1)
+        self.assertEqual(labels.cache_stats()['coalesced_remote'], 1)
+
+    def test_private_dir(self):
+        path = os.path.dirname(self.path)
+        self.assertEqual(private_dir(os.path.join(path, "data")), os.path.join(path, "data"))
+        self.assertEqual(os.stat(os.path.join(path, "data")).st_mode & 0o777, 0o700)
+        os.chmod(path, 0o777)
+        # a world-writable directory isn't private
+        with self.assertRaises(PermissionError):
+            private_dir(path)
+
+    def test_sqlite_cache_ignores_unsigned_items(self):
+        cache = SQLiteCache('test', 10, 60, path=self.path)
+        cache['k'] = 1
+        self.assertEqual(cache['k'], 1)
+        # as written by someone else
+        data = zlib.compress(pickle.dumps(2))
+        cache._db.execute("UPDATE cache SET value = ? WHERE name = 'test'", (b"\0" * 32 + data,))
+        self.assertIsNone(cache.get('k'))
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "snapshot")
+
+    def test_snapshot_round_trip(self):
+        calls = []
+
+        @cached(TTLCache(10, 60), ttl=60)
+        def query(s, t=None):
+            calls.append(s)
+            return [sorted(s)]
+
+        self.assertEqual(query(frozenset({'wd:Q1', 'wd:Q2'})), [['wd:Q1', 'wd:Q2']])
+        self.assertGreaterEqual(save_snapshot(self.path), 1)
+
+        query.cache.clear()
+        self.assertGreaterEqual(load_snapshot(self.path), 1)
+        self.assertEqual(query(frozenset({'wd:Q2', 'wd:Q1'})), [['wd:Q1', 'wd:Q2']])
+        self.assertEqual(len(calls), 1)
+
+    def test_snapshot_merges_the_workers_items(self):
+        @cached(TTLCache(10, 60), ttl=60)
+        def label(qid):
+            return qid.lower()
+
+        label('Q1')
+        save_snapshot(self.path)
+        # another worker, which didn't load the snapshot, saves its own items
+        label.cache.clear()
+        label('Q2')
+        save_snapshot(self.path)
+
+        label.cache.clear()
+        load_snapshot(self.path)
+        self.assertEqual(sorted(label.cache), [label.cache_key('Q1'), label.cache_key('Q2')])
+
+        # a snapshot that wasn't written by garbanzo is ignored
+        with open(self.path, 'r+b') as f:
+            f.write(b"\0")
+        label.cache.clear()
+        self.assertEqual(load_snapshot(self.path), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
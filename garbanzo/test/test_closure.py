@@ -0,0 +1,71 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from requests import Timeout
+
+from garbanzo import closure, lookup, utils
+from garbanzo.utils import get_semgroups_from_qids
+
+# direct superclasses (P279) of some types, with a cycle between Q4 and Q5
+SUPERCLASSES = {2: [1], 3: [1, 2], 4: [3, 5], 5: [4], 6: [7]}
+
+
+async def subclasses_query(query):
+    parents = set(int(x[4:]) for x in query.split("{ ", 2)[2].split(" }")[0].split())
+    return {'results': {'bindings': [{'c': {'value': "http://www.wikidata.org/entity/Q{}".format(qid)}}
+                                     for qid, superclasses in SUPERCLASSES.items() if parents & set(superclasses)]}}
+
+
+class TestClosure(unittest.TestCase):
+
+    def tearDown(self):
+        closure.index = None
+
+    def test_closure_round_trip(self):
+        path = os.path.join(tempfile.mkdtemp(), "closure.json.gz")
+        # Q18123741 (infectious disease) is a subclass of disease, Q8054 is a protein
+        closure.save({12136: ('DISO',), 18123741: ('DISO',), 8054: ('CHEM', 'GENE')}, path)
+        loaded = closure.load(path)
+        self.assertEqual(loaded, {12136: ('DISO',), 18123741: ('DISO',), 8054: ('CHEM', 'GENE')})
+        self.assertIs(loaded[12136], loaded[18123741])
+
+    def test_semgroups_from_the_closure(self):
+        self.assertIsNone(closure.index)
+        self.assertEqual(get_semgroups_from_qids(["wd:Q18123741"]), [])
+        closure.index = {12136: ('DISO',), 18123741: ('DISO',), 8054: ('CHEM', 'GENE')}
+        self.assertEqual(get_semgroups_from_qids(["wd:Q18123741", "Q5"]), ['DISO'])
+        self.assertEqual(sorted(get_semgroups_from_qids(["Q8054", "Q12136"])), ['CHEM', 'DISO', 'GENE'])
+
+    def test_subclasses_level_by_level(self):
+        with patch.object(utils, 'aexecute_sparql_query', subclasses_query), patch.object(closure, 'BATCH_SIZE', 1):
+            self.assertEqual(closure.subclasses_of("Q1"), {1, 2, 3, 4, 5})
+            self.assertEqual(closure.subclasses_of("Q5"), {4, 5})
+            self.assertEqual(closure.build({'Q3': ['DISO'], 'Q7': ['CHEM']}),
+                             {3: ('DISO',), 4: ('DISO',), 5: ('DISO',), 6: ('CHEM',), 7: ('CHEM',)})
+
+    def test_build_fails_clearly(self):
+        async def timeout(query):
+            raise Timeout("read timed out")
+
+        with patch.object(utils, 'aexecute_sparql_query', timeout):
+            with self.assertRaisesRegex(RuntimeError, "Q12136"):
+                closure.build({'Q12136': ['DISO']})
+
+    def test_semgroups_filtered_in_sparql_with_the_closure(self):
+        query = lookup._statements_page_query(frozenset(["wd:Q1"]), types=frozenset(["DISO"]))
+        self.assertIn("?s wdt:P31 ?gtype", query)
+        self.assertIn("wd:Q12136", query)
+        closure.index = {12136: ('DISO',)}
+        query = lookup._statements_page_query(frozenset(["wd:Q1"]), types=frozenset(["DISO"]))
+        self.assertIn("?s wdt:P31/wdt:P279* ?gtype", query)
+        self.assertIn("wd:Q12136", query)
+
+
+if __name__ == '__main__':
+    unittest.main()
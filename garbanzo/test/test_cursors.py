@@ -0,0 +1,39 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import unittest
+
+from garbanzo import cursors
+
+
+class TestCursors(unittest.TestCase):
+
+    def test_cursor_pages_through_a_snapshot(self):
+        items = list(range(250))
+        query = (['wd:Q1'], None)
+        cursor = cursors.start(items, query)
+
+        pages = []
+        while cursor:
+            page, cursor = cursors.get_page(cursor, query, 30)
+            pages.append(page)
+        # pages straddle the chunks of the snapshot
+        self.assertEqual([x for page in pages for x in page], items)
+        self.assertEqual([len(page) for page in pages], [30] * 8 + [10])
+
+        page, cursor = cursors.get_page(cursors.start([], query), query, 10)
+        self.assertEqual(page, [])
+        self.assertIsNone(cursor)
+
+    def test_invalid_cursors(self):
+        query = (['wd:Q1'], None)
+        cursor = cursors.start([1, 2, 3], query)
+        for bad_cursor, bad_query in [(cursor, (['wd:Q2'], None)), ("not a cursor", query),
+                                      (cursors._encode("0123456789abcdef", 0), query)]:
+            with self.assertRaises(cursors.InvalidCursor):
+                cursors.get_page(bad_cursor, bad_query, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import pickle
+import unittest
+
+from garbanzo.filtering import LabelIndex, Statements, label_index
+
+
+def statement(i, s, p, o, s_group="", o_group=""):
+    return {'id': "wds:Q{}$x".format(i),
+            'subject': {'id': "wd:Q1", 'name': s, 'semanticGroup': s_group},
+            'predicate': {'id': "wd:P1", 'name': p},
+            'object': {'id': "wd:Q2", 'name': o, 'semanticGroup': o_group}}
+
+
+STATEMENTS = [statement(0, "Night blindness", "opposite of", "Day blindness", "DISO", "DISO"),
+              statement(1, "KCNJ11", "genetic association", "Neonatal diabetes", "GENE CHEM", "DISO"),
+              statement(2, "aspirin", "physically interacts with", "PTGS1", "CHEM", "GENE"),
+              statement(3, "Douglas Adams", "", "Q42", "LIVB", ""),
+              statement(4, "", "", "")]
+
+
+class TestFiltering(unittest.TestCase):
+
+    def test_match_keywords(self):
+        index = LabelIndex(STATEMENTS)
+        self.assertEqual(index.match_keywords(["BLIND"]), [0])
+        self.assertEqual(index.match_keywords(["diabetes", "ptgs", "nomatch"]), [1, 2])
+        # the labels of a statement are run together, but never with the ones of the next statement
+        self.assertEqual(index.match_keywords(["blindnessopposite"]), [0])
+        self.assertEqual(index.match_keywords(["withptgs1"]), [2])
+        self.assertEqual(index.match_keywords(["ptgs1douglas"]), [])
+        self.assertEqual(index.match_keywords(["adamsq42", "in"]), [0, 2, 3])
+        self.assertEqual(index.match_keywords([""]), [0, 1, 2, 3, 4])
+        self.assertEqual(index.match_keywords(["\0"]), [])
+        self.assertEqual(LabelIndex([]).match_keywords(["a", ""]), [])
+
+    def test_match_types(self):
+        index = LabelIndex(STATEMENTS)
+        self.assertEqual(index.match_types(["CHEM"]), [1, 2])
+        self.assertEqual(index.match_types(["LIVB", "DISO"]), [0, 1, 3])
+        # semantic groups are matched exactly
+        self.assertEqual(index.match_types(["GEN", "CHEMGENE"]), [])
+        self.assertEqual(index.match_types(["GENE"], [0, 2, 3]), [2])
+
+    def test_label_index_is_kept_with_the_statements(self):
+        statements = Statements(STATEMENTS)
+        self.assertEqual(statements, STATEMENTS)
+        self.assertIs(label_index(statements), label_index(statements))
+        self.assertIsNot(label_index(Statements(STATEMENTS)), label_index(statements))
+        # a plain list isn't indexed for good
+        self.assertIsNot(label_index(STATEMENTS), label_index(STATEMENTS))
+        # nor is the index pickled
+        copy = pickle.loads(pickle.dumps(statements))
+        self.assertIsInstance(copy, Statements)
+        self.assertEqual(copy, statements)
+        self.assertIsNone(copy.label_index)
+
+
+if __name__ == '__main__':
+    unittest.main()
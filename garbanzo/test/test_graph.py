@@ -0,0 +1,66 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import os
+import random
+import tempfile
+import unittest
+
+from garbanzo import graph
+from garbanzo.store import StatementStore
+
+
+def make_statements(n, entities=50, seed=0):
+    rng = random.Random(seed)
+    statements = []
+    for i in range(n):
+        s = "Q{}".format(rng.randrange(1, entities))
+        t = rng.choice(["Q{}".format(rng.randrange(1, entities)), "P{}".format(rng.randrange(1, 5))])
+        guid = "{:08X}-{}".format(rng.getrandbits(32), i)
+        statements.append(("wds:{}${}".format(s, guid), s, "P{}".format(rng.randrange(1, 8)), t))
+    return statements
+
+
+def make_graph(statements):
+    directory = tempfile.mkdtemp()
+    store = StatementStore(os.path.join(directory, "statements.sqlite"))
+    store.add_statements(statements)
+    store.commit()
+    path = os.path.join(directory, "statements.graph")
+    graph.save(graph.build(store.iter_statements()), path)
+    return store, graph.Graph(path)
+
+
+class TestGraph(unittest.TestCase):
+
+    def test_entity_keys(self):
+        for entity in ["Q1", "Q123456789", "P31", "L7"]:
+            self.assertEqual(graph.entity_id(graph.entity_key(entity)), entity)
+        self.assertIsNone(graph.entity_key("L7-F1"))
+        self.assertLess(graph.entity_key("Q1"), graph.entity_key("Q2"))
+        self.assertLess(graph.entity_key("Q2"), graph.entity_key("P1"))
+
+    def test_graph_matches_the_store(self):
+        store, statement_graph = make_graph(make_statements(2000))
+        rng = random.Random(1)
+        try:
+            for _ in range(200):
+                s = set("Q{}".format(rng.randrange(1, 60)) for _ in range(rng.randrange(1, 4)))
+                t = set("Q{}".format(rng.randrange(1, 60)) for _ in range(rng.randrange(0, 30))) or None
+                relations = set("P{}".format(rng.randrange(1, 9)) for _ in range(rng.randrange(0, 3))) or None
+                self.assertEqual(statement_graph.match(s, t, relations), store.match(s, t, relations))
+            self.assertEqual(statement_graph.match({"Q1000", "L7-F1"}), [])
+        finally:
+            statement_graph.close()
+
+    def test_skipped_statements(self):
+        statements = [("wds:Q1$A", "Q1", "P1", "Q2"), ("wds:Q1$B", "Q1", "P2", "L3-F1")]
+        store, statement_graph = make_graph(statements)
+        self.assertEqual(statement_graph.match({"Q1"}), [("wds:Q1$A", "Q1", "P1", "Q2")])
+        self.assertEqual(statement_graph.match({"Q2"}, {"Q1"}, {"P1"}), [("wds:Q1$A", "Q1", "P1", "Q2")])
+        statement_graph.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import unittest
+
+from garbanzo.models.concept_with_details import ConceptWithDetails
+from garbanzo.models.statement import Statement
+from garbanzo.models.statement_subject import StatementSubject
+from garbanzo.models.statements_result import StatementsResult
+
+
+class TestModels(unittest.TestCase):
+
+    def test_slots_models(self):
+        statement = Statement(id="wds:Q1$A",
+                              subject=StatementSubject(id="wd:Q1", name="insulin", semantic_group="CHEM"))
+        self.assertFalse(hasattr(statement, '__dict__'))
+        self.assertIs(statement.swagger_types, Statement.swagger_types)
+        self.assertEqual(statement, Statement(id="wds:Q1$A", subject=StatementSubject(id="wd:Q1", name="insulin",
+                                                                                      semantic_group="CHEM")))
+        self.assertNotEqual(statement, Statement(id="wds:Q1$B"))
+        self.assertNotEqual(statement, "wds:Q1$A")
+        self.assertEqual(statement.to_dict(), {'id': "wds:Q1$A", 'predicate': None, 'object': None,
+                                               'subject': {'id': "wd:Q1", 'name': "insulin",
+                                                           'semantic_group': "CHEM"}})
+
+    def test_from_dict(self):
+        concept = ConceptWithDetails.from_dict({'id': "wd:Q1", 'semanticGroup': "CHEM", 'synonyms': ["a", "b"]})
+        self.assertEqual((concept.id, concept.semantic_group, concept.synonyms, concept.name),
+                         ("wd:Q1", "CHEM", ["a", "b"], None))
+        result = StatementsResult.from_dict({'statements': [{'id': "wds:Q1$A", 'subject': {'semanticGroup': "CHEM"}},
+                                                            None]})
+        self.assertEqual(result.statements[0],
+                         Statement(id="wds:Q1$A", subject=StatementSubject(semantic_group="CHEM")))
+        self.assertIsNone(result.statements[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,6 +21,23 @@ class TestPredicatesController(BaseTestCase):
                                     method='GET')
         self.assert200(response, "Response body is : " + response.data.decode('utf-8'))
 
+    def test_get_predicates_not_modified(self):
+        """
+        Test case for get_predicates with the ETag of a previous response
+        """
+        response = self.client.open('/predicates', method='GET')
+        self.assert200(response, "Response body is : " + response.data.decode('utf-8'))
+        etag = response.headers['ETag']
+
+        response = self.client.open('/predicates', method='GET', headers={'If-None-Match': etag})
+        self.assertStatus(response, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.data, b"")
+
+        # as weakened by a proxy
+        response = self.client.open('/predicates', method='GET', headers={'If-None-Match': "W/" + etag})
+        self.assertStatus(response, 304)
+
 
 if __name__ == '__main__':
     import unittest
@@ -0,0 +1,99 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import threading
+import unittest
+from unittest.mock import patch
+
+from garbanzo import lookup, settings, upstream
+
+# 120 search results, every third one a chemical
+RESULTS = ["Q{}".format(i) for i in range(120)]
+
+
+def semgroup(qid):
+    return "CHEM" if int(qid[1:]) % 3 == 0 else "DISO"
+
+
+class TestSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        for patcher in [patch.object(upstream, 'get_wikidata_api', self.get_wikidata_api),
+                        patch.object(lookup, 'getConcepts', self.getConcepts),
+                        patch.object(settings, 'SEARCH_PREFETCH', False)]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        lookup.search_entities.cache.clear()
+        lookup._search_offsets.clear()
+
+    def get_wikidata_api(self, params):
+        self.calls.append((params['continue'], params['limit']))
+        found = RESULTS[params['continue']:params['continue'] + params['limit']]
+        d = {'search': [{'id': x, 'repository': "wikidata", 'concepturi': x} for x in found]}
+        if params['continue'] + params['limit'] < len(RESULTS):
+            d['search-continue'] = params['continue'] + params['limit']
+        return d
+
+    @staticmethod
+    def getConcepts(qids):
+        return {x: {'id': x, 'semanticGroup': semgroup(x[3:])} for x in qids}
+
+    def test_unfiltered_pages(self):
+        page = lookup.search_wikidata(["insulin"], pageNumber=3, pageSize=10)
+        self.assertEqual([x['id'] for x in page], ["wd:Q{}".format(i) for i in range(20, 30)])
+        self.assertEqual(self.calls, [(20, 10)])
+
+    def test_filtered_pages_are_filled(self):
+        chemicals = ["wd:" + x for x in RESULTS if semgroup(x) == "CHEM"]
+        pages = [lookup.search_wikidata(["insulin"], semgroups=["CHEM"], pageNumber=n, pageSize=15)
+                 for n in (1, 2, 3, 4)]
+        self.assertEqual([[x['id'] for x in page] for page in pages],
+                         [chemicals[:15], chemicals[15:30], chemicals[30:], []])
+        self.assertEqual(self.calls, [(0, 50), (43, 50), (88, 50)])
+
+    def test_filtered_page_out_of_order(self):
+        page = lookup.search_wikidata(["insulin"], semgroups=["CHEM", "GENE"], pageNumber=2, pageSize=10)
+        self.assertEqual([x['id'] for x in page], ["wd:Q{}".format(i) for i in range(30, 60, 3)])
+        # page 1 is filled on the way, and its end is remembered
+        self.assertEqual(lookup._search_offsets[("insulin", frozenset(["CHEM", "GENE"]), 10, 2)], 28)
+        self.assertEqual(lookup.search_wikidata(["insulin"], semgroups=["CHEM"], pageNumber=5, pageSize=10), [])
+
+    def test_filtered_page_batches_are_bounded(self):
+        with patch.object(settings, 'SEARCH_MAX_BATCHES', 1):
+            page = lookup.search_wikidata(["insulin"], semgroups=["CHEM"], pageNumber=1, pageSize=20)
+            self.assertEqual(len(page), 17)
+            page = lookup.search_wikidata(["insulin"], semgroups=["CHEM"], pageNumber=2, pageSize=20)
+            self.assertEqual(page[0]['id'], "wd:Q51")
+
+    def test_next_page_is_prefetched(self):
+        lookup.prefetch_search_page("insulin", frozenset(["CHEM"]), 2, 15).result()
+        self.assertEqual(self.calls, [(0, 50), (43, 50)])
+        self.assertIn(("insulin", frozenset(["CHEM"]), 15, 3), lookup._search_offsets)
+
+    def test_prefetch_is_dropped_when_busy(self):
+        started, release = threading.Semaphore(0), threading.Event()
+
+        def search_page(*args):
+            started.release()
+            release.wait()
+
+        with patch.object(lookup, '_search_page', search_page):
+            futures = []
+            while True:
+                future = lookup.prefetch_search_page("insulin", frozenset(["CHEM"]), 2, 15)
+                if future is None:
+                    break
+                futures.append(future)
+                started.acquire()
+            release.set()
+            for future in futures:
+                future.result()
+            self.assertEqual(len(futures), settings.SEARCH_PREFETCH_WORKERS)
+            # the slots are free again
+            lookup.prefetch_search_page("insulin", frozenset(["CHEM"]), 2, 15).result()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import json
+import unittest
+
+from garbanzo import serialization
+from garbanzo.models.statement import Statement
+from garbanzo.models.statements_result import StatementsResult
+
+STATEMENT = {'id': "wds:Q7758678$7E9D7D33-BC33-4A17-9F9A-4CEE0D1AB9DE",
+             'subject': {'id': "wd:Q7758678", 'name': "night blindness", 'semanticGroup': "DISO"},
+             'predicate': {'id': "wd:P461", 'name': "opposite of"},
+             'object': {'id': "wd:Q1350017", 'name': "day blindness/hemeralopia", 'semanticGroup': ""}}
+
+
+class TestSerialization(unittest.TestCase):
+
+    def test_project(self):
+        self.assertEqual(serialization.project(STATEMENT, Statement), STATEMENT)
+        statement = dict(STATEMENT, extra=1, predicate={'id': "wd:P461", 'name': None})
+        self.assertEqual(serialization.project(statement, Statement), dict(STATEMENT, predicate={'id': "wd:P461"}))
+        self.assertEqual(serialization.project({'statements': [statement]}, StatementsResult),
+                         {'statements': [dict(STATEMENT, predicate={'id': "wd:P461"})]})
+
+    def test_dumps(self):
+        body = serialization.dumps([STATEMENT, {'name': "é"}])
+        self.assertTrue(isinstance(body, bytes))
+        self.assertEqual(json.loads(body.decode('utf-8')), [STATEMENT, {'name': "é"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
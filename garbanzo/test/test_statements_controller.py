@@ -2,7 +2,9 @@
 
 from __future__ import absolute_import
 
-from garbanzo import lookup
+import unittest
+
+from garbanzo import lookup, upstream
 from garbanzo.models.statement import Statement
 from . import BaseTestCase
 from six import BytesIO
@@ -30,43 +32,98 @@ class TestStatementsController(BaseTestCase):
                                     query_string=query_string)
         self.assert200(response, "Response body is : " + response.data.decode('utf-8'))
 
+    def test_get_statements_stream(self):
+        """
+        Test case for get_statements streamed as ndjson
+        """
+        query_string = [('s', "wd:Q7758678"), ('keywords', 'blind')]
+        response = self.client.open('/statements', method='GET', query_string=query_string + [('pageSize', 1000)])
+        self.assert200(response, "Response body is : " + response.data.decode('utf-8'))
+        for streamed in [self.client.open('/statements', method='GET', query_string=query_string + [('stream', 'true')]),
+                         self.client.open('/statements', method='GET', query_string=query_string,
+                                          headers={'Accept': 'application/x-ndjson'})]:
+            self.assert200(streamed)
+            self.assertEqual(streamed.mimetype, "application/x-ndjson")
+            statements = [json.loads(line) for line in streamed.data.decode('utf-8').splitlines()]
+            # streamed in the order the endpoint finds them
+            self.assertEqual(sorted(statements, key=lambda x: x['id']),
+                             sorted(json.loads(response.data.decode('utf-8')), key=lambda x: x['id']))
 
-def test_query_statements():
-    s = ["wd:Q27869338"]  # gregory stupp
-    datapage = lookup.query_statements(s)
-    subjects = [x['subject']['id'] for x in datapage]
-    objects = [x['object']['id'] for x in datapage]
-    # the item searched for should be both in objects and subjects
-    assert "wd:Q27869338" in subjects and "wd:Q27869338" in objects
-    # Q41949373 is a publication. it should be in the subjects only
-    assert "wd:Q41949373" in subjects and "wd:Q41949373" not in objects
-
-    s = ["wd:Q7758678"]  # night blindess
-    relations = ['wd:P461']  # opposite of (has recip relation)
-    datapage = lookup.query_statements(s, relations=relations)
-    subjects = [x['subject']['id'] for x in datapage]
-    objects = [x['object']['id'] for x in datapage]
-    assert 'wd:Q7758678' in objects and 'wd:Q7758678' in subjects
-    assert 'wd:Q7757581' in objects and 'wd:Q7757581' in subjects
-
-    s = ["wd:Q7758678"]  # night blindess
-    relations = ['wd:P461']  # opposite of (has recip relation)
-    t = ['wd:Q7757581']
-    datapage = lookup.query_statements(s, t, relations=relations)
-    subjects = [x['subject']['id'] for x in datapage]
-    objects = [x['object']['id'] for x in datapage]
-    assert 'wd:Q7758678' in objects and 'wd:Q7758678' in subjects
-    assert 'wd:Q7757581' in objects and 'wd:Q7757581' in subjects
-
-    s = ["wd:Q7758678", "wd:Q7757581", "wd:Q550455"]
-    t = ["wd:Q7758678", "wd:Q7757581"]
-    datapage = lookup.query_statements(s, t)
-
-    s = ["wd:Q7758678", "wd:Q7757581", "wd:Q550455"]
-    datapage = lookup.query_statements(s)
+    def test_get_statements_batch(self):
+        """
+        Test case for get_statements_batch: the same pages as one /statements call per query
+        """
+        queries = [{'s': ["wd:Q7758678"], 'pageSize': 1000},
+                   {'s': ["wd:Q27869338"], 'keywords': 'stupp', 'pageSize': 5},
+                   {'s': ["wd:Q7758678"], 'relations': 'wd:P461'}]
+        response = self.client.open('/statements/batch', method='POST', data=json.dumps(queries),
+                                    content_type='application/json')
+        self.assert200(response, "Response body is : " + response.data.decode('utf-8'))
+        results = json.loads(response.data.decode('utf-8'))
+        self.assertEqual(len(results), len(queries))
+        for query, result in zip(queries, results):
+            single = self.client.open('/statements', method='GET', query_string=query)
+            self.assertEqual(result['statements'], json.loads(single.data.decode('utf-8')))
 
 
-if __name__ == '__main__':
-    import unittest
+class TestStatementsLookup(unittest.TestCase):
+    """ Statements lookups against wikidata """
+
+    def test_query_statements(self):
+        s = ["wd:Q27869338"]  # gregory stupp
+        datapage = lookup.query_statements(s)
+        subjects = [x['subject']['id'] for x in datapage]
+        objects = [x['object']['id'] for x in datapage]
+        # the item searched for should be both in objects and subjects
+        assert "wd:Q27869338" in subjects and "wd:Q27869338" in objects
+        # Q41949373 is a publication. it should be in the subjects only
+        assert "wd:Q41949373" in subjects and "wd:Q41949373" not in objects
 
+        s = ["wd:Q7758678"]  # night blindess
+        relations = ['wd:P461']  # opposite of (has recip relation)
+        datapage = lookup.query_statements(s, relations=relations)
+        subjects = [x['subject']['id'] for x in datapage]
+        objects = [x['object']['id'] for x in datapage]
+        assert 'wd:Q7758678' in objects and 'wd:Q7758678' in subjects
+        assert 'wd:Q7757581' in objects and 'wd:Q7757581' in subjects
+
+        s = ["wd:Q7758678"]  # night blindess
+        relations = ['wd:P461']  # opposite of (has recip relation)
+        t = ['wd:Q7757581']
+        datapage = lookup.query_statements(s, t, relations=relations)
+        subjects = [x['subject']['id'] for x in datapage]
+        objects = [x['object']['id'] for x in datapage]
+        assert 'wd:Q7758678' in objects and 'wd:Q7758678' in subjects
+        assert 'wd:Q7757581' in objects and 'wd:Q7757581' in subjects
+
+        s = ["wd:Q7758678", "wd:Q7757581", "wd:Q550455"]
+        t = ["wd:Q7758678", "wd:Q7757581"]
+        datapage = lookup.query_statements(s, t)
+
+        s = ["wd:Q7758678", "wd:Q7757581", "wd:Q550455"]
+        datapage = lookup.query_statements(s)
+
+    def test_single_statements_query(self):
+        # one query for both directions gives the same statements as one query per direction
+        for s, t in [(["wd:Q27869338"], None),
+                     (["wd:Q7758678", "wd:Q7757581", "wd:Q550455"], ["wd:Q7758678", "wd:Q7757581"])]:
+            single = upstream.run(lookup.aquery_statements(s, t, single_query=True))
+            split = upstream.run(lookup.aquery_statements(s, t, single_query=False))
+            self.assertEqual(single, split)
+            single = upstream.run(lookup.aquery_statements_page(s, t, offset=3, limit=5, single_query=True))
+            split = upstream.run(lookup.aquery_statements_page(s, t, offset=3, limit=5, single_query=False))
+            self.assertEqual(single, split)
+
+    def test_get_statements_page(self):
+        # the filters and paging done by wikidata give the same page as filtering and paging all the statements
+        s = {"wd:Q7758678", "wd:Q550455"}
+        for keywords, types in [(None, None), (frozenset({"blind"}), None), (None, frozenset({"DISO"})),
+                                (frozenset({"BLIND", "vision"}), frozenset({"DISO", "GENE"}))]:
+            datapage = lookup.query_and_filter_statements(s, keywords=keywords, types=types)
+            for offset, limit in [(0, 10), (5, 3), (max(len(datapage) - 2, 0), 10)]:
+                page = lookup.query_statements_page(frozenset(s), None, None, keywords, types, offset, limit)
+                self.assertEqual(page, datapage[offset:offset + limit])
+
+
+if __name__ == '__main__':
     unittest.main()
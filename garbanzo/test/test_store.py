@@ -0,0 +1,83 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import json
+import os
+import tempfile
+import unittest
+
+from garbanzo import ingest
+from garbanzo.store import StatementStore
+
+ENTITIES = [
+    {'id': "Q1", 'labels': {'en': {'language': "en", 'value': "insulin"}},
+     'claims': {'P31': [{'id': "Q1$AAAA-1", 'rank': "normal",
+                         'mainsnak': {'snaktype': "value", 'property': "P31",
+                                      'datavalue': {'type': "wikibase-entityid",
+                                                    'value': {'entity-type': "item", 'id': "Q8054"}}}}],
+                'P2293': [{'id': "Q1$BBBB-2", 'rank': "normal",
+                           'mainsnak': {'snaktype': "value", 'property': "P2293",
+                                        'datavalue': {'type': "wikibase-entityid",
+                                                      'value': {'entity-type': "item", 'numeric-id': 2}}}}]}},
+    {'id': "Q2", 'labels': {'en': {'language': "en", 'value': "diabetes \"type 1\""}},
+     'claims': {'P31': [{'id': "Q2$CCCC-3", 'rank': "deprecated",
+                         'mainsnak': {'snaktype': "value", 'property': "P31",
+                                      'datavalue': {'type': "wikibase-entityid",
+                                                    'value': {'entity-type': "item", 'id': "Q5"}}}},
+                        {'id': "Q2$DDDD-4", 'rank': "normal",
+                         'mainsnak': {'snaktype': "value", 'property': "P31",
+                                      'datavalue': {'type': "wikibase-entityid",
+                                                    'value': {'entity-type': "item", 'id': "Q12136"}}}}]}},
+]
+
+NTRIPLES = """
+<http://www.wikidata.org/entity/Q1> <http://www.w3.org/2000/01/rdf-schema#label> "insulin"@en .
+<http://www.wikidata.org/entity/Q1> <http://www.w3.org/2000/01/rdf-schema#label> "insuline"@fr .
+<http://www.wikidata.org/entity/Q1> <http://www.wikidata.org/prop/direct/P31> <http://www.wikidata.org/entity/Q8054> .
+<http://www.wikidata.org/entity/statement/Q1-AAAA-1> <http://www.wikidata.org/prop/statement/P31> <http://www.wikidata.org/entity/Q8054> .
+<http://www.wikidata.org/entity/statement/Q1-BBBB-2> <http://www.wikidata.org/prop/statement/P2293> <http://www.wikidata.org/entity/Q2> .
+<http://www.wikidata.org/entity/statement/Q1-EEEE-5> <http://www.wikidata.org/prop/statement/P2067> "5808"^^<http://www.w3.org/2001/XMLSchema#decimal> .
+<http://www.wikidata.org/entity/Q2> <http://www.w3.org/2000/01/rdf-schema#label> "diabetes \\"type 1\\""@en .
+<http://www.wikidata.org/entity/Q2> <http://www.wikidata.org/prop/direct/P31> <http://www.wikidata.org/entity/Q12136> .
+<http://www.wikidata.org/entity/statement/Q2-CCCC-3> <http://www.wikidata.org/prop/statement/P31> <http://www.wikidata.org/entity/Q5> .
+<http://www.wikidata.org/entity/statement/Q2-DDDD-4> <http://www.wikidata.org/prop/statement/P31> <http://www.wikidata.org/entity/Q12136> .
+"""
+
+
+def make_store(records):
+    store = StatementStore(os.path.join(tempfile.mkdtemp(), "statements.sqlite"))
+    ingest.ingest(store, records)
+    store.create_indexes()
+    return store
+
+
+class TestStore(unittest.TestCase):
+
+    def test_json_and_ntriples_dumps(self):
+        json_store = make_store(ingest.read_json(["["] + [json.dumps(x) + "," for x in ENTITIES] + ["]"]))
+        nt_store = make_store(ingest.read_ntriples(NTRIPLES.splitlines()))
+
+        statements = json_store.query_statements(["wd:Q2"])
+        self.assertEqual(statements, nt_store.query_statements(["wd:Q2"]))
+        self.assertEqual([x['id'] for x in statements], ["wds:Q1$BBBB-2", "wds:Q2$CCCC-3", "wds:Q2$DDDD-4"])
+        self.assertEqual(sorted(statements[0]['subject'].pop('semanticGroup').split()), ["CHEM", "GENE"])
+        self.assertEqual(statements[0], {'id': "wds:Q1$BBBB-2",
+                                         'subject': {'id': "wd:Q1", 'name': "insulin"},
+                                         'predicate': {'id': "wd:P2293", 'name': "P2293"},
+                                         'object': {'id': "wd:Q2", 'name': 'diabetes "type 1"',
+                                                    'semanticGroup': "DISO"}})
+        # the deprecated P31 isn't a type
+        self.assertEqual(statements[1]['object'], {'id': "wd:Q5", 'name': "Q5", 'semanticGroup': ""})
+
+    def test_query_statements_filters(self):
+        store = make_store(ingest.read_json([json.dumps(x) for x in ENTITIES]))
+        self.assertEqual([x['id'] for x in store.query_statements(["Q1"], ["Q2"])], ["wds:Q1$BBBB-2"])
+        self.assertEqual([x['id'] for x in store.query_statements(["Q2"], ["Q1"])], ["wds:Q1$BBBB-2"])
+        self.assertEqual([x['id'] for x in store.query_statements(["Q2"], relations=["wd:P31"])],
+                         ["wds:Q2$CCCC-3", "wds:Q2$DDDD-4"])
+        self.assertEqual(store.query_statements(["Q3"]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# coding: utf-8
+
+from __future__ import absolute_import
+
+import json
+import unittest
+from types import SimpleNamespace
+
+from flask import Response
+
+from garbanzo.validation import ResponseValidator
+
+
+class Operation:
+    operation = {'responses': {'200': {'schema': {'type': "array", 'items': {'type': "string"}}}}}
+    api = SimpleNamespace(get_response=lambda response: response)
+
+    def resolve_reference(self, definition):
+        return definition
+
+    def json_loads(self, data):
+        return json.loads(data.decode('utf-8'))
+
+
+def make_endpoint(mode, sample=1):
+    validator = ResponseValidator(Operation(), "application/json")
+    validator.mode, validator.sample = mode, sample
+    responses = {'valid': Response(b'["wd:Q1"]', mimetype="application/json"),
+                 'invalid': Response(b'[1]', mimetype="application/json")}
+    endpoint = validator(lambda request: responses[request.args])
+    return validator, lambda body: endpoint(SimpleNamespace(args=body, url="http://localhost/test"))
+
+
+class TestResponseValidator(unittest.TestCase):
+
+    def test_always(self):
+        validator, endpoint = make_endpoint("always")
+        self.assertEqual(endpoint('valid').status_code, 200)
+        self.assertEqual(endpoint('invalid').status_code, 500)
+        # the validator of the 200 responses is compiled once
+        self.assertIs(validator._definition(200), validator._definition("200"))
+
+    def test_sampled(self):
+        validated = []
+        validator, endpoint = make_endpoint("sampled", sample=3)
+        validate_response = validator.validate_response
+        validator.validate_response = lambda *args: validated.append(args[0]) or validate_response(*args)
+        self.assertEqual([endpoint('invalid').status_code for _ in range(6)], [200] * 6)
+        self.assertEqual(validated, [b'[1]', b'[1]'])
+
+    def test_off(self):
+        validator, endpoint = make_endpoint("off")
+        self.assertEqual(endpoint('invalid').status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+HTTP client used for every call to Wikidata (the API and the SPARQL endpoint).
+
+Each worker process keeps one pooled ``requests.Session`` so that connections (and their TLS sessions) are reused
+across requests instead of being re-established for every upstream call. The session is re-created after a fork,
+as uwsgi forks its workers after the app is imported. Streamed responses are read on connections of their own.
+
+Coroutine versions of the calls (``aget``, ``aget_json``...) run the blocking request on a small thread pool, so
+that independent upstream calls can be awaited concurrently with ``asyncio.gather`` and synchronous code can drive
+them with ``run``. Only leaf calls are ever submitted to the pool: code running in it must never call ``run``.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from garbanzo import settings
+
+WIKIDATA_API = "https://www.wikidata.org/w/api.php"
+SPARQL_ENDPOINT = "https://query.wikidata.org/sparql"
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+
+
+def make_session():
+    """
+    Build a session with a connection pool sized from the settings.
+    With HTTP_POOL_BLOCK, no more than HTTP_POOL_MAXSIZE connections are ever opened to the same host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=settings.HTTP_POOL_CONNECTIONS,
+                          pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+                          pool_block=settings.HTTP_POOL_BLOCK)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({'User-Agent': settings.USER_AGENT,
+                            'Accept-Encoding': 'gzip, deflate' if settings.HTTP_GZIP else 'identity',
+                            'Connection': 'keep-alive' if settings.HTTP_KEEP_ALIVE else 'close'})
+    return session
+
+
+def get_session():
+    """
+    Get the session of the current worker process
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session_pid != pid:
+        with _session_lock:
+            if _session_pid != pid:
+                _session = make_session()
+                _session_pid = pid
+    return _session
+
+
+def get(url, params=None, headers=None, timeout=None, stream=False):
+    """
+    GET a url through the pooled session
+    :param url:
+    :param params: query string parameters
+    :param headers: extra headers, merged over the session defaults
+    :param timeout: seconds, defaults to settings.HTTP_TIMEOUT
+    :param stream: don't read the body yet, and read it on a connection of a session of its own, which is closed
+    with the response: a body read as slowly as a client reads a streamed response must not hold one of the
+    HTTP_POOL_MAXSIZE pooled connections, which the other calls of the worker wait for
+    :return: requests.Response (raises for an error status)
+    """
+    session = make_session() if stream else get_session()
+    response = session.get(url, params=params, headers=headers, stream=stream,
+                           timeout=timeout if timeout is not None else settings.HTTP_TIMEOUT)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    return response
+
+
+def get_json(url, params=None, headers=None):
+    return get(url, params=params, headers=headers).json()
+
+
+def get_wikidata_api(params):
+    """
+    Call the wikidata api (https://www.wikidata.org/w/api.php) and return the decoded json
+    """
+    return get_json(WIKIDATA_API, params=params)
+
+
+def get_executor():
+    """
+    Get the thread pool of the current worker process that the coroutine calls run in
+    """
+    global _executor, _executor_pid
+    pid = os.getpid()
+    if _executor_pid != pid:
+        with _session_lock:
+            if _executor_pid != pid:
+                _executor = ThreadPoolExecutor(max_workers=settings.ASYNC_MAX_WORKERS)
+                _executor_pid = pid
+    return _executor
+
+
+async def to_thread(func, *args):
+    """
+    Await a blocking call run on the pool. func must be a leaf call: it must never call run()
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args))
+
+
+async def aget(url, params=None, headers=None, timeout=None):
+    return await to_thread(get, url, params, headers, timeout)
+
+
+async def aget_json(url, params=None, headers=None):
+    return await to_thread(get_json, url, params, headers)
+
+
+async def aget_wikidata_api(params):
+    return await aget_json(WIKIDATA_API, params=params)
+
+
+async def gather(*coros):
+    """
+    asyncio.gather that can be passed to run(): the tasks are only created once the loop runs
+    """
+    return await asyncio.gather(*coros)
+
+
+def run(coro):
+    """
+    Run a coroutine to completion from synchronous code, on a new event loop
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
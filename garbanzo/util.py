@@ -1,7 +1,9 @@
-from typing import GenericMeta
 from datetime import datetime, date
 from six import integer_types, iteritems
 
+# the deserializer of each class, built on first use (see _deserializer)
+_deserializers = {}
+
 
 def _deserialize(data, klass):
     """
@@ -15,21 +17,93 @@ def _deserialize(data, klass):
     if data is None:
         return None
 
+    return _deserializer(klass)(data)
+
+
+def _generic(klass):
+    """
+    Tells typing's List[...] and Dict[...] apart, whatever the python version: their __origin__ is list or dict since
+    python 3.7, and their __extra__ before that (when they were GenericMeta instances, with List as __origin__).
+
+    :param klass: class literal.
+    :return: (list or dict, type arguments), or (None, None) if klass is neither.
+    """
+    for container in (list, dict):
+        if getattr(klass, '__origin__', None) is container or getattr(klass, '__extra__', None) is container:
+            return container, klass.__args__
+    return None, None
+
+
+def _deserializer(klass):
+    """
+    Gets the function deserializing data (not None) into klass, compiled once per class.
+
+    :param klass: class literal.
+    :return: function.
+    """
+    try:
+        return _deserializers[klass]
+    except KeyError:
+        pass
+
     if klass in integer_types or klass in (float, str, bool):
-        return _deserialize_primitive(data, klass)
+        deserializer = lambda data: _deserialize_primitive(data, klass)
     elif klass == object:
-        return _deserialize_object(data)
+        deserializer = _deserialize_object
     elif klass == date:
-        return deserialize_date(data)
+        deserializer = deserialize_date
     elif klass == datetime:
-        return deserialize_datetime(data)
-    elif type(klass) == GenericMeta:
-        if klass.__extra__ == list:
-            return _deserialize_list(data, klass.__args__[0])
-        if klass.__extra__ == dict:
-            return _deserialize_dict(data, klass.__args__[1])
+        deserializer = deserialize_datetime
     else:
-        return deserialize_model(data, klass)
+        container, args = _generic(klass)
+        if container is list:
+            sub = _deserializer(args[0])
+            deserializer = lambda data: [None if x is None else sub(x) for x in data]
+        elif container is dict:
+            sub = _deserializer(args[1])
+            deserializer = lambda data: {k: None if v is None else sub(v) for k, v in iteritems(data)}
+        elif args is None and isinstance(klass, type):
+            deserializer = _model_deserializer(klass)
+        else:
+            deserializer = lambda data: None
+
+    _deserializers[klass] = deserializer
+    return deserializer
+
+
+def _model_deserializer(klass):
+    """
+    Compiles the deserializer of a model: the json key, setter and deserializer of each attribute are looked up once.
+
+    :param klass: class literal.
+    :return: function.
+    """
+    if not klass.swagger_types:
+        return lambda data: data
+
+    fields = []
+    for attr, attr_type in iteritems(klass.swagger_types):
+        setter = getattr(klass, attr, None)
+        setter = setter.fset if isinstance(setter, property) and setter.fset is not None else \
+            (lambda instance, value, attr=attr: setattr(instance, attr, value))
+        fields.append((klass.attribute_map[attr], setter, attr_type))
+
+    compiled = None
+
+    def deserialize(data):
+        # the deserializers of the attributes are looked up on first use, as the models can refer to each other
+        nonlocal compiled
+        if compiled is None:
+            compiled = [(key, setter, _deserializer(attr_type)) for key, setter, attr_type in fields]
+        instance = klass()
+        if isinstance(data, (list, dict)):
+            for key, setter, deserializer in compiled:
+                if key in data:
+                    value = data[key]
+                    setter(instance, None if value is None else deserializer(value))
+        return instance
+
+    return deserialize
 
 
 def _deserialize_primitive(data, klass):
@@ -103,19 +177,7 @@ def deserialize_model(data, klass):
     :param klass: class literal.
     :return: model object.
     """
-    instance = klass()
-
-    if not instance.swagger_types:
-        return data
-
-    for attr, attr_type in iteritems(instance.swagger_types):
-        if data is not None \
-                and instance.attribute_map[attr] in data \
-                and isinstance(data, (list, dict)):
-            value = data[instance.attribute_map[attr]]
-            setattr(instance, attr, _deserialize(value, attr_type))
-
-    return instance
+    return _deserializer(klass)(data)
 
 
 def _deserialize_list(data, boxed_type):
@@ -6,10 +6,13 @@
 provenence map: https://github.com/monarch-initiative/dipper/blob/master/dipper/models/Provenance.py
 
 """
+import csv
+import io
 from collections import defaultdict
 from itertools import chain
 from functools import wraps
-import requests
+
+from garbanzo import closure, upstream
 
 
 def alwayslist(value):
@@ -71,7 +74,14 @@ for k, vs in qid_semgroup.items():
 
 
 def get_semgroups_from_qids(qids):
+    """
+    :param qids: types (P31 values) of an item
+    :return: the semantic groups of the types, or of the types they are subclasses of when the closure is loaded
+    (see garbanzo.closure)
+    """
     qids = map(always_qid, qids)
+    if closure.index is not None:
+        return list(set(chain(*[closure.semgroups(x) for x in qids])))
     semgroups = list(set(chain(*[qid_semgroup[x] for x in qids if x in qid_semgroup])))
     return semgroups
 
@@ -81,8 +91,7 @@ def get_qids_from_semgroups(types):
     return qids
 
 
-def execute_sparql_query(query, prefix=None, endpoint='https://query.wikidata.org/sparql',
-                         user_agent='tmp: github.com/SuLab/tmp'):
+def _sparql_request(query, prefix=None, user_agent='tmp: github.com/SuLab/tmp'):
     wd_standard_prefix = '''
         PREFIX wd: <http://www.wikidata.org/entity/>
         PREFIX wdt: <http://www.wikidata.org/prop/direct/>
@@ -99,9 +108,48 @@ def execute_sparql_query(query, prefix=None, endpoint='https://query.wikidata.or
               'format': 'json'}
     headers = {'Accept': 'application/sparql-results+json',
                'User-Agent': user_agent}
-    response = requests.get(endpoint, params=params, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    return params, headers
+
+
+def sparql_string(s):
+    """
+    :return: s as a SPARQL string literal
+    """
+    return '"' + s.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r') + '"'
+
+
+def execute_sparql_query(query, prefix=None, endpoint=upstream.SPARQL_ENDPOINT,
+                         user_agent='tmp: github.com/SuLab/tmp'):
+    params, headers = _sparql_request(query, prefix, user_agent)
+    return upstream.get_json(endpoint, params=params, headers=headers)
+
+
+def iter_sparql_query(query, prefix=None, endpoint=upstream.SPARQL_ENDPOINT,
+                      user_agent='tmp: github.com/SuLab/tmp'):
+    """
+    Run a query and stream its results: the rows are parsed as they are read from the response, which is never held
+    in memory as a whole. The query is sent (and its errors raised) by this call, not when the rows are iterated.
+    :return: iterator of {variable: value} rows. The value of an unbound variable is ""
+    """
+    params, headers = _sparql_request(query, prefix, user_agent)
+    del params['format']
+    headers['Accept'] = 'text/csv'
+    response = upstream.get(endpoint, params=params, headers=headers, stream=True)
+    response.raw.decode_content = True  # gunzip as it is read
+    return _iter_csv_rows(response)
+
+
+def _iter_csv_rows(response):
+    try:
+        yield from csv.DictReader(io.TextIOWrapper(response.raw, encoding='utf-8', newline=''))
+    finally:
+        response.close()
+
+
+async def aexecute_sparql_query(query, prefix=None, endpoint=upstream.SPARQL_ENDPOINT,
+                                user_agent='tmp: github.com/SuLab/tmp'):
+    params, headers = _sparql_request(query, prefix, user_agent)
+    return await upstream.aget_json(endpoint, params=params, headers=headers)
 
 
 def make_frozenset(f):
@@ -0,0 +1,94 @@
+"""
+Response validation, as done by connexion with validate_responses=True, except that:
+ - streamed responses (e.g. the application/x-ndjson statements) aren't validated: reading their body to validate it
+   would hold all of it in memory before sending the first byte, and they aren't json anyway
+ - the schema validator of each response (status) of an operation is compiled once, not for every response
+ - settings.RESPONSE_VALIDATION chooses how many responses are validated: "always" (an invalid response is replaced by
+   a 500 error, as connexion does), "sampled" (one in settings.RESPONSE_VALIDATION_SAMPLE, an invalid response is
+   logged and sent anyway) or "off" (the API is added with validate_responses=False, see validate_responses())
+
+    connexion.App(..., validator_map={'response': ResponseValidator})
+    app.add_api(..., validate_responses=validate_responses())
+"""
+import functools
+import itertools
+import logging
+
+from connexion.decorators.response import ResponseValidator as ConnexionResponseValidator
+from connexion.decorators.validation import ResponseBodyValidator
+from connexion.exceptions import NonConformingResponseBody, NonConformingResponseHeaders
+from jsonschema import ValidationError
+
+from garbanzo import settings
+
+MODES = ("always", "sampled", "off")
+
+logger = logging.getLogger(__name__)
+
+
+def validate_responses():
+    """
+    :return: the validate_responses argument of add_api, for settings.RESPONSE_VALIDATION
+    """
+    if settings.RESPONSE_VALIDATION not in MODES:
+        raise ValueError("GARBANZO_RESPONSE_VALIDATION must be one of {}, not {!r}".format(
+            ", ".join(MODES), settings.RESPONSE_VALIDATION))
+    return settings.RESPONSE_VALIDATION != "off"
+
+
+class ResponseValidator(ConnexionResponseValidator):
+
+    def __init__(self, operation, mimetype):
+        super().__init__(operation, mimetype)
+        self.mode = settings.RESPONSE_VALIDATION
+        self.sample = max(settings.RESPONSE_VALIDATION_SAMPLE, 1)
+        self._responses = itertools.count()
+        self._definitions = {}
+
+    def _definition(self, status_code):
+        # the response definition of a status, and the validator of its body (None if it has no json schema)
+        key = str(status_code)
+        if key not in self._definitions:
+            definitions = self.operation.operation["responses"]
+            definition = self.operation.resolve_reference(definitions.get(key, definitions.get("default", {})))
+            validator = ResponseBodyValidator(definition["schema"]) if self.is_json_schema_compatible(definition) \
+                else None
+            self._definitions[key] = definition, validator
+        return self._definitions[key]
+
+    def validate_response(self, data, status_code, headers, url):
+        definition, validator = self._definition(status_code)
+        if validator is not None:
+            try:
+                validator.validate_schema(self.operation.json_loads(data), url)
+            except ValidationError as e:
+                raise NonConformingResponseBody(message=str(e))
+
+        if definition and definition.get("headers"):
+            missing_keys = set(definition["headers"].keys()) - set(headers.keys())
+            if missing_keys:
+                msg = ("Keys in header don't match response specification. "
+                       "Difference: {0}").format(', '.join(missing_keys))
+                raise NonConformingResponseHeaders(message=msg)
+        return True
+
+    def __call__(self, function):
+        validate = super().__call__
+
+        @functools.wraps(function)
+        def wrapper(request):
+            response = function(request)
+            if response.is_streamed or self.mode == "off":
+                return response
+            if self.mode == "sampled":
+                if next(self._responses) % self.sample == 0:
+                    try:
+                        self.validate_response(response.get_data(), response.status_code, response.headers,
+                                               request.url)
+                    except (NonConformingResponseBody, NonConformingResponseHeaders) as e:
+                        logger.warning("%s: the response doesn't conform to the specification: %s", request.url,
+                                       e.message)
+                return response
+            return validate(lambda _: response)(request)
+
+        return wrapper
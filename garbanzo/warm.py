@@ -0,0 +1,61 @@
+"""
+Pre-warm the lookup caches for a list of hot concepts and save them to a cache snapshot, which the workers load
+on startup (see garbanzo.cache.setup_snapshots):
+
+    python -m garbanzo.warm hot_concepts.txt --snapshot /var/cache/garbanzo/snapshot
+
+The input has one concept id (wd:Q... or Q...) per line. Blank lines and lines starting with # are ignored.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from garbanzo import cache, lookup, settings
+from garbanzo.utils import always_curie
+
+
+def read_ids(f):
+    ids = [line.strip() for line in f]
+    return [always_curie(x) for x in ids if x and not x.startswith("#")]
+
+
+def _warm_statements(qid):
+    try:
+        lookup.query_statements([qid])
+    except Exception as e:
+        print("{}: {}".format(qid, e), file=sys.stderr)
+
+
+def warm(qids, jobs=4):
+    """
+    Load the concepts, their statements and the types into the caches
+    :param qids: concept curies
+    :param jobs: number of statement queries run at once
+    """
+    lookup.getConcepts(qids)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        list(executor.map(_warm_statements, qids))
+    lookup.get_all_types()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Pre-warm a garbanzo cache snapshot from a list of concept ids")
+    parser.add_argument('ids', type=argparse.FileType('r'), help="file with one concept id per line, - for stdin")
+    parser.add_argument('--snapshot', default=settings.CACHE_SNAPSHOT_PATH,
+                        help="snapshot file to write (default: GARBANZO_CACHE_SNAPSHOT_PATH). "
+                             "The items of an existing snapshot are kept")
+    parser.add_argument('--jobs', type=int, default=4, help="statement queries run at once")
+    args = parser.parse_args(args)
+    if not args.snapshot:
+        parser.error("--snapshot is required when GARBANZO_CACHE_SNAPSHOT_PATH is not set")
+
+    if os.path.exists(args.snapshot):
+        cache.load_snapshot(args.snapshot)
+    warm(read_ids(args.ids), jobs=args.jobs)
+    n = cache.save_snapshot(args.snapshot)
+    print("saved {} cached items to {}".format(n, args.snapshot))
+
+
+if __name__ == '__main__':
+    main()
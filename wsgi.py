@@ -1,10 +1,15 @@
 import connexion
+from garbanzo.cache import setup_snapshots, setup_stats_logging
 from garbanzo.encoder import JSONEncoder
+from garbanzo.validation import ResponseValidator, validate_responses
 
-app = connexion.App("garbanzo.__main__", specification_dir='./swagger/')
+app = connexion.App("garbanzo.__main__", specification_dir='./swagger/',
+                    validator_map={'response': ResponseValidator})
 app.app.json_encoder = JSONEncoder
 app.add_api('swagger.yaml',
             arguments={'title': 'A SPARQL/Wikidata Query API wrapper for Translator'},
-            validate_responses=True)
+            validate_responses=validate_responses())
+setup_snapshots()  # once the controllers (and so the cached lookups) are loaded
+setup_stats_logging()
 application = app.app
 application.run(host='0.0.0.0')